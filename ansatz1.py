@@ -1,78 +1,116 @@
-def build_ansatz(graph: nx.Graph) -> QuantumCircuit:
-    def misra_gries_coloring(G):
-        edge_colors = {}
-        uncolored_edges = list(G.edges())
-        
-        while uncolored_edges:
-            u, v = uncolored_edges.pop()
-            fan = [v]
-            
-            # Find first available colors using incremental search
-            used_colors_u = {edge_colors[e] for e in G.edges(u) if e in edge_colors}
-            used_colors_v = {edge_colors[e] for e in G.edges(v) if e in edge_colors}
-            
-            # Find first available color for u
-            c = 0
-            while c in used_colors_u:
-                c += 1
-                
-            # Find first available color for v
-            d = 0
-            while d in used_colors_v:
-                d += 1
-
-            # Find maximal alternating path with safety checks
-            w = v
-            while True:
-                # Get adjacent colors with default None
-                adjacent_colors = (edge_colors.get((w, x)) for x in G.neighbors(w))
-                # Find first occurrence of color c
-                found = False
-                for neighbor in G.neighbors(w):
-                    if edge_colors.get((w, neighbor)) == c and neighbor != u:
-                        w = neighbor
-                        found = True
-                        break
-                if not found:
-                    break
-                c, d = d, c  # Swap colors
-            
-            # Invert path colors with edge existence check
-            x = w
-            while x != v:
-                # Find next node with color c
-                next_nodes = [y for y in G.neighbors(x) 
-                            if edge_colors.get((x, y)) == c]
-                if not next_nodes:
+import networkx as nx
+from qiskit import QuantumCircuit
+from qiskit.circuit import ParameterVector
+
+def edge_coloring(graph: nx.Graph) -> dict:
+    """
+    Color the edges of ``graph`` with at most Δ+1 colors (Misra–Gries), so
+    that no two edges sharing a node get the same color.
+
+    Every node keeps a map from the colors of its edges to the neighbour
+    across them, so free colors, fans and alternating paths are found without
+    rescanning the graph: O(|E|·Δ) plus the length of the inverted paths.
+    Returns a dictionary mapping every edge ``(u, v)`` of ``graph.edges`` to
+    its color.
+    """
+    num_colors = max((d for _, d in graph.degree), default=0) + 1
+    color_at = {node: dict() for node in graph}   # color -> neighbour
+    colors = {node: dict() for node in graph}     # neighbour -> color
+
+    def free_color(x):
+        return next(c for c in range(num_colors) if c not in color_at[x])
+
+    def set_color(x, y, c):
+        color_at[x][c], color_at[y][c] = y, x
+        colors[x][y] = colors[y][x] = c
+
+    def clear_color(x, y):
+        c = colors[x].pop(y)
+        del colors[y][x], color_at[x][c], color_at[y][c]
+
+    for u, v in graph.edges:
+        # Maximal fan of u starting at v: each next edge (u, f) is colored
+        # with a color free on the previous fan node
+        fan, in_fan = [v], {v}
+        while True:
+            last = fan[-1]
+            for c, y in color_at[u].items():
+                if y not in in_fan and c not in color_at[last]:
+                    fan.append(y)
+                    in_fan.add(y)
                     break
-                y = next_nodes[0]
-                edge_colors[(x, y)] = d
-                x = y
-                c, d = d, c  # Swap colors
+            else:
+                break
 
-            # Apply final coloring
-            edge_colors[(u, v)] = c
-            
-        return edge_colors
+        # Invert the cd-path from u, which makes d free on u
+        c, d = free_color(u), free_color(fan[-1])
+        if c != d:
+            path, x, col = list(), u, d
+            while col in color_at[x]:
+                y = color_at[x][col]
+                path.append((x, y))
+                x, col = y, c if col == d else d
+            flipped = [(x, y, d if colors[x][y] == c else c) for x, y in path]
+            for x, y in path:
+                clear_color(x, y)
+            for x, y, col in flipped:
+                set_color(x, y, col)
 
-    edge_coloring = misra_gries_coloring(graph)
-    max_color = max(edge_coloring.values()) + 1
+        # Find the first fan node w where d is free, the fan up to w still
+        # being a fan, then rotate that prefix and color (u, w) with d
+        end = 0
+        while d in color_at[fan[end]]:
+            end += 1
+            assert end < len(fan) and colors[u][fan[end]] not in color_at[fan[end - 1]], "no fan prefix to rotate"
+        shifted = [colors[u][f] for f in fan[1:end + 1]]
+        for f in fan[1:end + 1]:
+            clear_color(u, f)
+        for f, col in zip(fan[:end], shifted):
+            set_color(u, f, col)
+        set_color(u, fan[end], d)
+
+    return {(u, v): colors[u][v] for u, v in graph.edges}
+
+def build_ansatz(graph: nx.Graph) -> QuantumCircuit:
+    """
+    Build a layered ansatz with one CX-RY-CX layer per color class of
+    ``edge_coloring(graph)``. Edges of a class share no qubit, so each layer
+    has depth 3 and the circuit depth is at most 3(Δ+1) + 1. The edges of a
+    class share one parameter.
+    """
+    edge_colors = edge_coloring(graph)
+    num_colors = max(edge_colors.values(), default=-1) + 1
+    index = {node: i for i, node in enumerate(graph)}
 
     ansatz = QuantumCircuit(graph.number_of_nodes())
     ansatz.h(range(graph.number_of_nodes()))
-    
-    theta = ParameterVector(r"θ", max_color)
-    
-    for color in range(max_color):
-        edges = [e for e, c in edge_coloring.items() if c == color]
-        param = theta[color]
-        for u, v in edges:
-            ansatz.cx(u, v)
+
+    theta = ParameterVector(r"θ", num_colors)
+    layers = [list() for _ in range(num_colors)]
+    for (u, v), color in edge_colors.items():
+        layers[color].append((index[u], index[v]))
+
+    for param, layer in zip(theta, layers):
+        controls, targets = [u for u, _ in layer], [v for _, v in layer]
+        ansatz.cx(controls, targets)
+        for v in targets:
             ansatz.ry(param, v)
-            ansatz.cx(u, v)
-    
+        ansatz.cx(controls, targets)
+
     return ansatz
 
+def describe_ansatz(ansatz: QuantumCircuit) -> dict:
+    """
+    Report the depth, two-qubit depth, CX count and number of parameters of
+    ``ansatz``.
+    """
+    return {
+        "depth": ansatz.depth(),
+        "cx_depth": ansatz.depth(lambda instruction: instruction.operation.num_qubits == 2),
+        "cx_count": ansatz.count_ops().get("cx", 0),
+        "num_parameters": ansatz.num_parameters,
+    }
+
 
 # Base score: 0.05591
 # Balanced score: 0.05426
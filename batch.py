@@ -0,0 +1,123 @@
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import networkx as nx
+
+from build_graph import build_ansatz
+from check import challenge_scores, cx_count, sample_states
+from generate_graph import make_graph
+from ising import IsingHamiltonian
+from maxcut import CHALLENGES
+from solution_cache import SolutionCache
+from varQITE import QITEvolver
+
+COLUMNS = [
+    "graph", "num_nodes", "num_edges", "num_steps", "lr", "exact", "num_shots",
+    "final_energy", "energies", "runtime", "quantum_exec_time", "cx_count",
+    "base_score", "balanced_score", "connected_score",
+]
+
+def parse_graph_spec(spec: str):
+    """
+    Split a graph spec such as ``"expander_graph_n:16"`` or
+    ``"random_connected_graph_16:p=0.18"`` into the name of a graph registered
+    in ``generate_graph`` and its positional and keyword arguments.
+    """
+    name, _, arg_str = spec.partition(":")
+    args, kwargs = list(), dict()
+    for arg in filter(None, arg_str.split(",")):
+        key, _, value = arg.rpartition("=")
+        value = json.loads(value)
+        if key:
+            kwargs[key] = value
+        else:
+            args.append(value)
+    return name, args, kwargs
+
+def build_graph(spec: str) -> nx.Graph:
+    """
+    Build the graph described by ``spec``, relabelling its nodes ``0, ..., n-1``.
+    """
+    name, args, kwargs = parse_graph_spec(spec)
+    return nx.convert_node_labels_to_integers(make_graph(name, *args, **kwargs))
+
+def run_problem(spec: str, num_steps: int, lr: float, exact: bool, num_shots: int, score_shots: int, threads: int):
+    """
+    Evolve the MaxCut problem of one graph spec with QITE and score the result,
+    returning one row of the results file. Aer uses at most ``threads``
+    threads for this run, and the exhaustive search a single process.
+    """
+    graph = build_graph(spec)
+    ansatz = build_ansatz(graph)
+    start_time = time.time()
+    qit_evolver = QITEvolver(IsingHamiltonian.from_graph(graph), ansatz, exact=exact)
+    qit_evolver.backend.set_options(max_parallel_threads=threads)
+    qit_evolver.num_shots = num_shots
+    qit_evolver.evolve(num_steps=num_steps, lr=lr, verbose=False)
+    runtime = time.time() - start_time
+
+    samples = sample_states(ansatz, qit_evolver.param_vals[-1], score_shots, qit_evolver.backend)
+    solutions = SolutionCache().solve(graph, processes=1)
+    scores = challenge_scores(graph, *(solutions[c][1] for c in CHALLENGES), samples, score_shots, ansatz)
+    return {
+        "graph": spec,
+        "num_nodes": graph.number_of_nodes(),
+        "num_edges": graph.number_of_edges(),
+        "num_steps": num_steps,
+        "lr": lr,
+        "exact": exact,
+        "num_shots": num_shots,
+        "final_energy": qit_evolver.energies[-1],
+        "energies": json.dumps([float(e) for e in qit_evolver.energies]),
+        "runtime": runtime,
+        "quantum_exec_time": sum(qit_evolver.runtime),
+        "cx_count": cx_count(ansatz),
+        **{c + "_score": float(scores[c]) for c in CHALLENGES},
+    }
+
+def run_batch(specs, out: str, processes: int = None, threads: int = 1, **settings):
+    """
+    Run ``run_problem`` for every graph spec in ``specs`` on a pool of
+    ``processes`` workers with ``threads`` Aer threads each, appending each
+    row to the CSV file ``out`` as soon as its run finishes.
+    """
+    processes = processes or max(1, (os.cpu_count() or 1) // threads)
+    write_header = not os.path.exists(out) or os.path.getsize(out) == 0
+    with open(out, "a", newline="") as f, ProcessPoolExecutor(processes) as pool:
+        writer = csv.DictWriter(f, COLUMNS)
+        if write_header:
+            writer.writeheader()
+        futures = {pool.submit(run_problem, spec, threads=threads, **settings): spec for spec in specs}
+        for future in as_completed(futures):
+            try:
+                writer.writerow(future.result())
+                f.flush()
+                print("done: " + futures[future])
+            except Exception as e:
+                print("failed: " + futures[future] + " (" + repr(e) + ")")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evolve many MaxCut problems with QITE in parallel.")
+    parser.add_argument("graphs", nargs="+", help="graph specs, e.g. cycle_graph_c8 expander_graph_n:16")
+    parser.add_argument("--out", default="results.csv", help="CSV file the results are appended to")
+    parser.add_argument("--num-steps", type=int, default=40)
+    parser.add_argument("--lr", type=float, default=0.1)
+    parser.add_argument("--exact", action="store_true", help="use the exact statevector mode")
+    parser.add_argument("--num-shots", type=int, default=10000)
+    parser.add_argument("--score-shots", type=int, default=100_000)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--threads", type=int, default=1, help="Aer threads per worker")
+    args = parser.parse_args(argv)
+
+    run_batch(
+        args.graphs, args.out, processes=args.processes, threads=args.threads,
+        num_steps=args.num_steps, lr=args.lr, exact=args.exact,
+        num_shots=args.num_shots, score_shots=args.score_shots,
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+import argparse
+import json
+import platform
+import sys
+import time
+
+import networkx as nx
+import numpy as np
+import qiskit
+import qiskit_aer
+from qiskit.quantum_info import SparsePauliOp
+
+import ansatz1
+import check
+from batch import build_graph
+from build_graph import build_ansatz, build_maxcut_hamiltonian
+from check import challenge_scores, sample_states
+from ising import IsingHamiltonian
+from maxcut import CHALLENGES, exhaustive_maxcut
+from utils import counts_to_samples, result_to_samples
+from varQITE import QITEvolver
+
+# Graph families benchmarked at increasing sizes, as ``batch`` graph specs of n nodes
+FAMILIES = {
+    "expander": lambda n: "expander_graph_n:{}".format(n),
+    "bipartite": lambda n: "complete_bipartite_graph_k_nn:{}".format(n // 2),
+    "grid": lambda n: "grid_graph_nxm:2,{}".format(n // 2),
+}
+
+# The unbatched energy helpers ``get_defining_ode`` used to rely on, kept for
+# the reference construction below
+def get_z_masks(operator: SparsePauliOp):
+    """
+    Unroll the given Ising ``operator`` into a boolean matrix flagging the
+    qubits each Pauli word acts on, laid out like the operator's labels, and
+    the array of its real coefficients.
+    """
+    paulis = np.array([list(ops) for ops, _ in operator.label_iter()]) != "I"
+    return paulis, operator.coeffs.real
+
+def get_ising_energies(
+        operator: SparsePauliOp, 
+        states: np.array
+    ):
+    """
+    Get the energies of the given Ising ``operator`` that correspond to the
+    given ``states``.
+    """
+    # Unroll Hamiltonian data into NumPy arrays
+    paulis, coeffs = get_z_masks(operator)
+    
+    # Vectorized energies computation
+    energies = (-1) ** (states @ paulis.T) @ coeffs
+    return energies
+
+def expected_energy(
+        hamiltonian: SparsePauliOp,
+        measurements: np.array
+):
+    """
+    Compute the expected energy of the given ``hamiltonian`` with respect to
+    the observed ``measurement``.
+
+    The latter is assumed to by a NumPy records array with fields ``states``
+    --describing the observed bit-strings as an integer array-- and ``counts``,
+    describing the corresponding observed frequency of each state.
+    """
+    energies = get_ising_energies(hamiltonian, measurements["states"])
+    return np.dot(energies, measurements["counts"]) / measurements["counts"].sum()
+
+def reference_defining_ode(hamiltonian: SparsePauliOp, measurements):
+    """
+    Term-by-term construction of the varQITE dynamics matrix and load vector,
+    as ``QITEvolver.get_defining_ode`` used to do it. Kept as the reference the
+    batched construction is checked and timed against.
+    """
+    pauli_terms = [SparsePauliOp(op) for op, _ in hamiltonian.label_iter() if set(op) != set("I")]
+    Gmat = np.zeros((len(pauli_terms), (len(measurements) - 1) // 2))
+    for i, pauli_word in enumerate(pauli_terms):
+        for j, jth_pair in enumerate(zip(measurements[1::2], measurements[2::2])):
+            for pm, pm_shift in enumerate(jth_pair):
+                Gmat[i, j] += (-1)**pm * expected_energy(pauli_word, pm_shift)
+
+    curr_energy = expected_energy(hamiltonian, measurements[0])
+    dvec = np.zeros(len(pauli_terms))
+    for i, pauli_word in enumerate(pauli_terms):
+        rhs_op_energies = get_ising_energies(pauli_word, measurements[0]["states"])
+        rhs_op_energies *= get_ising_energies(hamiltonian, measurements[0]["states"]) - curr_energy
+        dvec[i] = -np.dot(rhs_op_energies, measurements[0]["counts"]) / measurements[0]["counts"].sum()
+    return Gmat, dvec, curr_energy
+
+def random_measurements(num_qubits: int, num_circuits: int, num_shots: int, seed: int = 0):
+    """
+    Draw ``num_circuits`` random counts dictionaries of ``num_shots`` shots each
+    over ``num_qubits`` qubits, standing in for the output of a QITE step.
+    """
+    rng = np.random.default_rng(seed)
+    measurements = []
+    for _ in range(num_circuits):
+        samples = rng.integers(0, 2**min(num_qubits, 62), size=num_shots)
+        keys, counts = np.unique(samples, return_counts=True)
+        measurements.append({format(k, "0{}b".format(num_qubits)): int(c) for k, c in zip(keys, counts)})
+    return measurements
+
+def bench_defining_ode(graph: nx.Graph, num_shots: int = 10000, repeats: int = 3):
+    """
+    Time the reference and batched ``get_defining_ode`` on the same random
+    measurements for ``graph``, checking that both agree.
+    """
+    ham = build_maxcut_hamiltonian(graph)
+    qit_evolver = QITEvolver(ham, build_ansatz(graph))
+    measurements = random_measurements(graph.number_of_nodes(), 2 * qit_evolver.ansatz.num_parameters + 1, num_shots)
+
+    # Both take records arrays decoded beforehand, so only the assembly is timed
+    dtype = np.dtype([("states", int, (graph.number_of_nodes(),)), ("counts", "f")])
+    records = [np.fromiter(map(lambda kv: (list(kv[0]), kv[1]), res.items()), dtype) for res in measurements]
+    samples = [counts_to_samples(res) for res in measurements]
+
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        expected = reference_defining_ode(ham, records)
+    reference_time = (time.perf_counter() - t0) / repeats
+
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        result = qit_evolver.get_defining_ode(samples)
+    batched_time = (time.perf_counter() - t0) / repeats
+
+    for x, y in zip(expected, result):
+        assert np.allclose(x, y, rtol=0, atol=1e-12), "batched defining ODE does not match reference"
+    return qit_evolver.ansatz.num_parameters, reference_time, batched_time
+
+def bench_stages(graph: nx.Graph, repeats: int = 3, max_exhaustive_nodes: int = 24):
+    """
+    Time every stage of a QITE run on ``graph`` separately, keeping the best of
+    ``repeats`` runs of each. The exhaustive search is skipped above
+    ``max_exhaustive_nodes`` nodes.
+    """
+    timings = dict()
+    def timed(stage, func, *args, **kwargs):
+        best = np.inf
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            result = func(*args, **kwargs)
+            best = min(best, time.perf_counter() - t0)
+        timings[stage] = best
+        return result
+
+    ansatz = timed("dfs_ansatz", build_ansatz, graph)
+    timed("coloring_ansatz", ansatz1.build_ansatz, graph)
+    ham = timed("hamiltonian", IsingHamiltonian.from_graph, graph)
+
+    # One QITE step, broken into its stages
+    qit_evolver = QITEvolver(ham, ansatz)
+    curr_params = np.zeros(ansatz.num_parameters)
+    timed("get_iteration_circuits", qit_evolver.get_iteration_circuits, curr_params)
+    iter_params = qit_evolver.get_iteration_params(curr_params)
+    result = timed(
+        "simulation",
+        lambda: qit_evolver.backend.run(
+            qit_evolver.iteration_circuit,
+            parameter_binds=[dict(zip(ansatz.parameters, iter_params.T))],
+            shots=qit_evolver.num_shots,
+        ).result()
+    )
+    measurements = timed(
+        "decode",
+        lambda: [result_to_samples(result, i, ansatz.num_qubits) for i in range(len(iter_params))]
+    )
+    Gmat, dvec, _ = timed("get_defining_ode", qit_evolver.get_defining_ode, measurements)
+    timed("lstsq", np.linalg.lstsq, Gmat, dvec, rcond=1e-2)
+
+    # Scoring against the exact solutions
+    if graph.number_of_nodes() <= max_exhaustive_nodes:
+        solutions = timed("get_challenge_solutions", exhaustive_maxcut, graph)
+        samples = sample_states(ansatz, curr_params, 100_000)
+        # Forget the cached CX count so that every repeat pays the transpile
+        def final_score():
+            check._cx_counts.clear()
+            return challenge_scores(graph, *(solutions[c][1] for c in CHALLENGES), samples, 100_000, ansatz)
+        timed("final_score", final_score)
+    return timings
+
+def run_stages(sizes, repeats: int = 3):
+    """
+    Run ``bench_stages`` on every graph family at every size in ``sizes`` and
+    collect the timings as flat records.
+    """
+    records = list()
+    for family, spec in FAMILIES.items():
+        for n in sizes:
+            graph = build_graph(spec(n))
+            for stage, seconds in bench_stages(graph, repeats).items():
+                records.append({
+                    "family": family,
+                    "num_nodes": graph.number_of_nodes(),
+                    "num_edges": graph.number_of_edges(),
+                    "stage": stage,
+                    "seconds": seconds,
+                })
+                print("{:<10}{:>4}{:>26}{:>12.4f}".format(family, graph.number_of_nodes(), stage, seconds))
+    return records
+
+def compare_to_baseline(records, baseline, tolerance: float = 1.5, min_seconds: float = 1e-3):
+    """
+    Get the records that are more than ``tolerance`` times slower than the
+    matching record of ``baseline``, ignoring stages faster than
+    ``min_seconds`` in both.
+    """
+    key = lambda r: (r["family"], r["num_nodes"], r["stage"])
+    reference = {key(r): r["seconds"] for r in baseline}
+    regressions = list()
+    for r in records:
+        before = reference.get(key(r))
+        if before is not None and max(before, r["seconds"]) > min_seconds and r["seconds"] > tolerance * before:
+            regressions.append(dict(r, baseline_seconds=before))
+    return regressions
+
+def run_ode_table():
+    graphs = {
+        "cycle_8": nx.cycle_graph(8),
+        "regular_4_8": nx.random_regular_graph(d=4, n=8, seed=42),
+        "cubic_16": nx.random_regular_graph(d=3, n=16, seed=42),
+        "expander_16": nx.random_regular_graph(d=4, n=16, seed=42),
+        "expander_24": nx.random_regular_graph(d=4, n=24, seed=42),
+    }
+
+    print("{:<14}{:>6}{:>6}{:>14}{:>14}{:>10}".format("graph", "E", "P", "reference[s]", "batched[s]", "speedup"))
+    for name, graph in graphs.items():
+        num_params, reference_time, batched_time = bench_defining_ode(graph)
+        print("{:<14}{:>6}{:>6}{:>14.4f}{:>14.4f}{:>10.1f}".format(
+            name, graph.number_of_edges(), num_params, reference_time, batched_time, reference_time / batched_time))
+
+def run_ansatz_table(num_edges=(1000, 2500, 5000, 10000)):
+    """
+    Time the DFS ansatz and Hamiltonian construction on 4-regular graphs with
+    ``num_edges`` edges each; the time per edge stays flat if both are linear.
+    """
+    print("{:<8}{:>8}{:>14}{:>16}{:>14}{:>16}".format("n", "E", "ansatz[s]", "per edge[us]", "hamilt.[s]", "per edge[us]"))
+    for E in num_edges:
+        graph = nx.random_regular_graph(d=4, n=E // 2, seed=42)
+        t0 = time.perf_counter()
+        build_ansatz(graph)
+        ansatz_time = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        IsingHamiltonian.from_graph(graph)
+        hamiltonian_time = time.perf_counter() - t0
+        print("{:<8}{:>8}{:>14.4f}{:>16.2f}{:>14.4f}{:>16.2f}".format(
+            graph.number_of_nodes(), E, ansatz_time, 1e6 * ansatz_time / E, hamiltonian_time, 1e6 * hamiltonian_time / E))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the QITE pipeline.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("ode", help="compare the batched defining ODE to the reference")
+    ansatz = subparsers.add_parser("ansatz", help="time the ansatz and Hamiltonian construction on large sparse graphs")
+    ansatz.add_argument("--edges", type=int, nargs="+", default=[1000, 2500, 5000, 10000])
+    stages = subparsers.add_parser("stages", help="time every stage across graph families and sizes")
+    stages.add_argument("--sizes", type=int, nargs="+", default=[8, 12, 16])
+    stages.add_argument("--repeats", type=int, default=3)
+    stages.add_argument("--out", default=None, help="JSON file to write the results to")
+    stages.add_argument("--baseline", default=None, help="JSON results of an earlier run to compare against")
+    stages.add_argument("--tolerance", type=float, default=1.5, help="slowdown factor reported as a regression")
+    args = parser.parse_args(argv)
+
+    if args.command == "ode":
+        run_ode_table()
+        return
+    if args.command == "ansatz":
+        run_ansatz_table(args.edges)
+        return
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "qiskit": qiskit.__version__,
+            "qiskit_aer": qiskit_aer.__version__,
+            "machine": platform.machine(),
+            "repeats": args.repeats,
+        },
+        "results": run_stages(args.sizes, args.repeats),
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare_to_baseline(results["results"], baseline, args.tolerance)
+        for r in regressions:
+            print("regression: {family} n={num_nodes} {stage}: {seconds:.4f}s vs {baseline_seconds:.4f}s".format(**r))
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import networkx as nx
+import numpy as np
 from qiskit import QuantumCircuit, transpile
-from qiskit.quantum_info import SparsePauliOp
+from qiskit.quantum_info import PauliList, SparsePauliOp
 
 from dfs import DFS
 
@@ -17,20 +18,20 @@ def draw_graph(graph: nx.Graph, ansatz: QuantumCircuit):
 
 def build_maxcut_hamiltonian(graph: nx.Graph) -> SparsePauliOp:
     """
-    Build the MaxCut Hamiltonian for the given graph H = (|E|/2)*I - (1/2)*Σ_{(i,j)∈E}(Z_i Z_j)
+    Build the MaxCut Hamiltonian for the given graph H = -(|E|/2)*I + (1/2)*Σ_{(i,j)∈E}(Z_i Z_j)
+    as a ``SparsePauliOp``. Every term stores a Z bit per node, so this takes
+    O(|E| n) time and memory; on large graphs, pass ``QITEvolver`` the Z-masks
+    of ``IsingHamiltonian.from_graph`` instead.
     """
-    num_qubits = len(graph.nodes)
-    edges = list(graph.edges())
+    num_qubits = graph.number_of_nodes()
+    edges = np.array(graph.edges, dtype=int).reshape(-1, 2)
     num_edges = len(edges)
 
-    pauli_terms = ["I"*num_qubits] # start with identity
-    coeffs = [-num_edges / 2]
-
-    for (u, v) in edges: # for each edge, add -(1/2)*Z_i Z_j
-        z_term = ["I"] * num_qubits
-        z_term[u] = "Z"
-        z_term[v] = "Z"
-        pauli_terms.append("".join(z_term))
-        coeffs.append(0.5)
-
-    return SparsePauliOp.from_list(list(zip(pauli_terms, coeffs)))
\ No newline at end of file
+    # Set the Z bits of every term at once: the identity first, then -(1/2)*Z_i Z_j
+    # for each edge, node i being character i of the label (qubit n-1-i)
+    z = np.zeros((num_edges + 1, num_qubits), dtype=bool)
+    rows = np.arange(1, num_edges + 1)
+    z[rows, num_qubits - 1 - edges[:, 0]] = True
+    z[rows, num_qubits - 1 - edges[:, 1]] = True
+    coeffs = np.concatenate([[-num_edges / 2], np.full(num_edges, 0.5)])
+    return SparsePauliOp(PauliList.from_symplectic(z, np.zeros_like(z)), coeffs)
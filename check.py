@@ -1,4 +1,3 @@
-import matplotlib.pyplot as plt
 import networkx as nx
 import numpy as np
 import time
@@ -6,43 +5,57 @@ import time
 from qiskit import QuantumCircuit, transpile
 from qiskit_aer import AerSimulator
 
-from utils import compute_cut_size
+from maxcut import CHALLENGES
+from postprocess import postprocess
+from solution_cache import SolutionCache
+from utils import counts_to_samples, format_states, pack_bitstrings, result_to_samples
 
 def build_solution(qit_evolver, ansatz, graph):
     shots = 100_000
 
     # Sample your optimized quantum state using Aer
-    backend = AerSimulator()
-    optimized_state = ansatz.assign_parameters(qit_evolver.param_vals[-1])
-    optimized_state.measure_all()
-    counts = backend.run(optimized_state, shots=shots).result().get_counts()
-
-    # Find the sampled bitstring with the largest cut value
-    cut_vals = sorted(((bs, compute_cut_size(graph, bs)) for bs in counts), key=lambda t: t[1])
-    best_bs = cut_vals[-1][0]
+    samples = sample_states(ansatz, qit_evolver.param_vals[-1], shots)
 
-    # Now find the most likely MaxCut solution as sampled from your optimized state
-    # We'll leave this part up to you!!!
-    most_likely_soln, _ = max(counts.items(), key=lambda x: x[1])
+    # Find the sampled bitstring with the largest cut value, the most likely
+    # one, and the best partition local search reaches from the top samples
+    partitions = postprocess(graph, samples)
+    best_bs = partitions["best"]["bitstring"]
+    most_likely_soln = partitions["most_likely"]["bitstring"]
 
-    print(counts)
+    print(dict(zip(format_states(samples["states"], ansatz.num_qubits), samples["counts"].astype(int).tolist())))
 
     interpret_solution(graph, best_bs)
-    print("Cut value: "+str(compute_cut_size(graph, best_bs)))
+    print("Cut value: "+str(partitions["best"]["cut"]))
+    print("Refined cut value: "+str(partitions["improved"]["cut"]))
     
     
     XS_brut, XS_balanced, XS_connected = get_challenge_solutions(graph)
-    print_shots(counts, shots, XS_brut, XS_balanced, XS_connected)
+    tallies = tally_shots(samples, XS_brut, XS_balanced, XS_connected)
+    print_shots(tallies, shots)
 
-    print("Base score: " + str(final_score(graph,XS_brut,XS_balanced, XS_connected,counts,shots,ansatz,'base')))
-    print("Balanced score: " + str(final_score(graph,XS_brut,XS_balanced, XS_connected,counts,shots,ansatz,'balanced')))
-    print("Connected score: " + str(final_score(graph,XS_brut,XS_balanced, XS_connected,counts,shots,ansatz,'connected')))
+    scores = challenge_scores(graph, XS_brut, XS_balanced, XS_connected, samples, shots, ansatz, tallies=tallies)
+    print("Base score: " + str(scores['base']))
+    print("Balanced score: " + str(scores['balanced']))
+    print("Connected score: " + str(scores['connected']))
     return most_likely_soln
 
+def sample_states(ansatz, params, shots, backend=None):
+    """
+    Sample the state prepared by ``ansatz`` at the given ``params`` ``shots``
+    times on ``backend`` (a default ``AerSimulator`` if not given), as a
+    ``utils.SAMPLES_DTYPE`` records array of packed states and their counts.
+    """
+    backend = backend or AerSimulator()
+    optimized_state = ansatz.assign_parameters(params)
+    optimized_state.measure_all()
+    return result_to_samples(backend.run(optimized_state, shots=shots).result(), 0, ansatz.num_qubits)
+
 def interpret_solution(graph, bitstring):
     """
     Visualize the given ``bitstring`` as a partition of the given ``graph``.
     """
+    import matplotlib.pyplot as plt
+
     pos = nx.spring_layout(graph, seed=42)
     set_0 = [i for i, b in enumerate(bitstring) if b == '0']
     set_1 = [i for i, b in enumerate(bitstring) if b == '1']
@@ -66,140 +79,77 @@ def interpret_solution(graph, bitstring):
     plt.axis('off')
     plt.show()
 
-def get_challenge_solutions(graph):
+def get_challenge_solutions(graph, cache=None):
     start_time = time.time()
-    # Brute-force approach with conditional checks
-
-    verbose = False
-
-    G = graph
-    n = len(G.nodes())
-    w = np.zeros([n, n])
-    for i in range(n):
-        for j in range(n):
-            temp = G.get_edge_data(i, j, default=0)
-            if temp != 0:
-                w[i, j] = 1.0
-    if verbose:
-        print(w)
-
-    best_cost_brute = 0
-    best_cost_balanced = 0
-    best_cost_connected = 0
-
-    for b in range(2**n):
-        x = [int(t) for t in reversed(list(bin(b)[2:].zfill(n)))]
-
-        # Create subgraphs based on the partition
-        subgraph0 = G.subgraph([i for i, val in enumerate(x) if val == 0])
-        subgraph1 = G.subgraph([i for i, val in enumerate(x) if val == 1])
-
-        bs = "".join(str(i) for i in x)
-        
-        # Check if subgraphs are not empty
-        if len(subgraph0.nodes) > 0 and len(subgraph1.nodes) > 0:
-            cost = 0
-            for i in range(n):
-                for j in range(n):
-                    cost = cost + w[i, j] * x[i] * (1 - x[j])
-            if best_cost_brute < cost:
-                best_cost_brute = cost
-                xbest_brute = x
-                XS_brut = []
-            if best_cost_brute == cost:
-                XS_brut.append(bs)
-
-            outstr = "case = " + str(x) + " cost = " + str(cost)
-
-            if (len(subgraph1.nodes)-len(subgraph0.nodes))**2 <= 1:
-                outstr += " balanced"
-                if best_cost_balanced < cost:
-                    best_cost_balanced = cost
-                    xbest_balanced = x
-                    XS_balanced = []
-                if best_cost_balanced == cost:
-                    XS_balanced.append(bs)
-
-            if nx.is_connected(subgraph0) and nx.is_connected(subgraph1):
-                outstr += " connected"
-                if best_cost_connected < cost:
-                    best_cost_connected = cost
-                    xbest_connected = x
-                    XS_connected = []
-                if best_cost_connected == cost:
-                    XS_connected.append(bs)
-            if verbose:
-                print(outstr)
-    
+    # Exhaustive search over all partitions, see ``maxcut.exhaustive_maxcut``,
+    # unless ``cache`` (by default the one in ``DEFAULT_CACHE_DIR``) has them
+    cache = cache or SolutionCache()
+    solutions = cache.solve(graph)
     end_time = time.time()
     print(end_time - start_time)
 
     # This is classical brute force solver results:
-    interpret_solution(graph, xbest_brute)
-    print(graph, xbest_brute)
-    print("\nBest solution = " + str(xbest_brute) + " cost = " + str(best_cost_brute))
-    print(XS_brut)
-
-    interpret_solution(graph, xbest_balanced)
-    print(graph, xbest_balanced)
-    print("\nBest balanced = " + str(xbest_balanced) + " cost = " + str(best_cost_balanced))
-    print(XS_balanced)
-
-    interpret_solution(graph, xbest_connected)
-    print(graph, xbest_connected)
-    print("\nBest connected = " + str(xbest_connected) + " cost = " + str(best_cost_connected))
-    print(XS_connected)
-    plt.show()
-
-    return XS_brut, XS_balanced, XS_connected
-
-def print_shots(counts, shots, XS_brut, XS_balanced, XS_connected):
-    # And this is how we calculate the shots counted toward scores for each class of the problems
-
-    sum_counts = 0
-    for bs in counts:
-        if bs in XS_brut:
-            sum_counts += counts[bs]
-
-    print(f"Pure max-cut: {sum_counts} out of {shots}")
-
-    sum_balanced_counts = 0
-    for bs in counts:
-        if bs in XS_balanced:
-            sum_balanced_counts += counts[bs]
-
-    print(f"Balanced max-cut: {sum_balanced_counts} out of {shots}")
-
-    sum_connected_counts = 0
-    for bs in counts:
-        if bs in XS_connected:
-            sum_connected_counts += counts[bs]
+    for challenge, label in zip(CHALLENGES, ["solution", "balanced", "connected"]):
+        best_cost, XS = solutions[challenge]
+        if not XS:
+            print("\nNo feasible " + label + " partition")
+            continue
+        xbest = [int(t) for t in XS[0]]
+        interpret_solution(graph, XS[0])
+        print(graph, xbest)
+        print("\nBest " + label + " = " + str(xbest) + " cost = " + str(best_cost))
+        print(XS)
+
+    return tuple(solutions[challenge][1] for challenge in CHALLENGES)
+
+def print_shots(tallies, shots):
+    # And these are the shots counted toward scores for each class of the
+    # problems, as tallied by ``tally_shots``
+    print(f"Pure max-cut: {tallies['base']} out of {shots}")
+    print(f"Balanced max-cut: {tallies['balanced']} out of {shots}")
+    print(f"Connected max-cut: {tallies['connected']} out of {shots}")
+
+def tally_shots(counts, XS_brut, XS_balanced, XS_connected):
+    """
+    Count the shots in ``counts``, a counts dictionary or a records array of
+    packed states as returned by ``sample_states``, that landed on an optimal
+    solution of each challenge.
+    """
+    if isinstance(counts, dict):
+        counts = counts_to_samples(counts)
+    hits = np.stack([
+        np.isin(counts["states"], pack_bitstrings(XS)) if XS else np.zeros(len(counts), dtype=bool)
+        for XS in (XS_brut, XS_balanced, XS_connected)
+    ], axis=1)
+    tallies = np.rint(counts["counts"] @ hits).astype(np.int64)
+    return dict(zip(CHALLENGES, tallies.tolist()))
+
+_cx_counts = dict()
+
+def cx_count(ansatz):
+    """
+    Get the number of CX gates in ``ansatz`` once transpiled to the scoring
+    basis. The transpilation only runs the first time a circuit is scored.
+    """
+    if id(ansatz) not in _cx_counts:
+        transpiled_ansatz = transpile(ansatz, basis_gates = ['cx','rz','sx','x'])
+        _cx_counts[id(ansatz)] = (ansatz, transpiled_ansatz.count_ops().get('cx', 0))
+    return _cx_counts[id(ansatz)][1]
 
-    print(f"Connected max-cut: {sum_connected_counts} out of {shots}")
+def challenge_scores(graph, XS_brut, XS_balanced, XS_connected, counts, shots, ansatz, tallies=None):
+    """
+    Compute the score of every challenge at once, sharing a single tally of
+    the shots and a single CX count of ``ansatz``. The tally is taken from
+    ``tallies``, as returned by ``tally_shots``, when the caller already has it.
+    """
+    if tallies is None:
+        tallies = tally_shots(counts, XS_brut, XS_balanced, XS_connected)
+    num_cx = cx_count(ansatz)
+    scores = dict()
+    for challenge, sum_counts in tallies.items():
+        score = (4*2*graph.number_of_edges())/(4*2*graph.number_of_edges() + num_cx) * sum_counts/shots
+        scores[challenge] = np.round(score,5)
+    return scores
 
 def final_score(graph, XS_brut, XS_balanced, XS_connected, counts, shots, ansatz, challenge):
-
-    if(challenge=='base'):
-        sum_counts = 0
-        for bs in counts:
-            if bs in XS_brut:
-                sum_counts += counts[bs]
-    elif(challenge=='balanced'):
-        sum_balanced_counts = 0
-        for bs in counts:
-            if bs in XS_balanced:
-                sum_balanced_counts += counts[bs]        
-        sum_counts = sum_balanced_counts
-    elif(challenge=='connected'):
-        sum_connected_counts = 0
-        for bs in counts:
-            if bs in XS_connected:
-                sum_connected_counts += counts[bs]
-        sum_counts = sum_connected_counts
-
-    
-    transpiled_ansatz = transpile(ansatz, basis_gates = ['cx','rz','sx','x'])
-    cx_count = transpiled_ansatz.count_ops()['cx']
-    score = (4*2*graph.number_of_edges())/(4*2*graph.number_of_edges() + cx_count) * sum_counts/shots
-
-    return np.round(score,5)
\ No newline at end of file
+    return challenge_scores(graph, XS_brut, XS_balanced, XS_connected, counts, shots, ansatz)[challenge]
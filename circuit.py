@@ -1,6 +1,7 @@
 from typing import Optional, List
 from qiskit import QuantumCircuit
-from qiskit.circuit import ParameterVector
+from qiskit.circuit import CircuitInstruction, ParameterVector
+from qiskit.circuit.library import CXGate, HGate, RYGate
 import networkx as nx
 
 class Circuit():
@@ -19,19 +20,25 @@ class Circuit():
     
     def _add_unoptimized_edges(self):
         """Appends the circuit corresponding to the unoptimized edges"""
+        qubits, cx = self.qc.qubits, CXGate()
         for t, edge in zip(self.gamma[len(self.opt_edges):], self.no_opt_edges):
-            self.qc.cx(edge[0],edge[1])
-            self.qc.ry(t,edge[1])
-            self.qc.cx(edge[0],edge[1])
+            control, target = qubits[edge[0]], qubits[edge[1]]
+            self.qc._append(CircuitInstruction(cx, (control, target)))
+            self.qc._append(CircuitInstruction(RYGate(t), (target,)))
+            self.qc._append(CircuitInstruction(cx, (control, target)))
     
         
     def create_circuit(self) -> QuantumCircuit:
-        """Given the set of optimized and unoptimized edges, creates the quantum circuit"""
-        self.qc.h(range(self.qc.num_qubits))
+        """Given the set of optimized and unoptimized edges, creates the quantum circuit.
+        Gates go through ``QuantumCircuit._append``, skipping the argument
+        broadcasting and checks of ``ry``/``cx`` on graphs with many edges"""
+        qubits, h, cx = self.qc.qubits, HGate(), CXGate()
+        for qubit in qubits:
+            self.qc._append(CircuitInstruction(h, (qubit,)))
 
         for t, edge in zip(self.gamma[:len(self.opt_edges)], self.opt_edges):
-            self.qc.ry(t,edge[1])
-            self.qc.cx(edge[0],edge[1])
+            self.qc._append(CircuitInstruction(RYGate(t), (qubits[edge[1]],)))
+            self.qc._append(CircuitInstruction(cx, (qubits[edge[0]], qubits[edge[1]])))
         
         self._add_unoptimized_edges()
         
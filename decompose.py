@@ -0,0 +1,217 @@
+import argparse
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import networkx as nx
+import numpy as np
+
+from batch import build_graph
+from build_graph import build_ansatz
+from check import sample_states
+from ising import IsingHamiltonian
+from postprocess import postprocess
+from varQITE import QITEvolver
+
+def partition_graph(graph: nx.Graph, max_qubits: int = 16, overlap: int = None, seed: int = 42):
+    """
+    Split ``graph`` into overlapping pieces of at most ``max_qubits`` nodes.
+
+    The nodes are first split into the fewest disjoint cores of at most
+    ``max_qubits - overlap`` nodes, all of nearly equal size, by recursive
+    Kernighan-Lin bisection, which keeps few edges between cores. Each piece is then its core plus up to
+    ``overlap`` (a quarter of ``max_qubits`` by default) neighbouring nodes,
+    those with the most edges into the core first. Returns a list of
+    ``(core, nodes)`` pairs of node lists, the core nodes first.
+    """
+    overlap = max_qubits // 4 if overlap is None else overlap
+    core_size = max_qubits - overlap
+    if core_size < 1:
+        raise ValueError("overlap must leave room for at least one core node")
+
+    # Split the nodes into as few cores as fit, as evenly as possible: a set
+    # of m nodes bound for k cores of q = m // k or q + 1 nodes is bisected
+    # into the nodes of k // 2 cores and those of the rest, each half getting
+    # its share of the m % k larger cores. Kernighan-Lin swaps preserve the
+    # sizes of the random starting bisection
+    rng = np.random.default_rng(seed)
+    cores, pending = list(), [(list(graph), -(-graph.number_of_nodes() // core_size))]
+    while pending:
+        nodes, num_cores = pending.pop()
+        if num_cores <= 1:
+            cores.append(sorted(nodes))
+            continue
+        left_cores = num_cores // 2
+        q, r = divmod(len(nodes), num_cores)
+        left_size = left_cores * q + min(r, left_cores)
+        shuffled = [nodes[i] for i in rng.permutation(len(nodes))]
+        start = (set(shuffled[:left_size]), set(shuffled[left_size:]))
+        left, right = nx.community.kernighan_lin_bisection(graph.subgraph(nodes), partition=start, seed=seed)
+        if len(left) != left_size:
+            left, right = right, left
+        pending.extend([(sorted(left), left_cores), (sorted(right), num_cores - left_cores)])
+
+    pieces = list()
+    for core in sorted(cores):
+        in_core = set(core)
+        links = dict()
+        for u in core:
+            for v in graph.neighbors(u):
+                if v not in in_core:
+                    links[v] = links.get(v, 0) + 1
+        halo = sorted(links, key=lambda v: (-links[v], v))[:overlap]
+        pieces.append((core, core + sorted(halo)))
+    return pieces
+
+def _piece_graph(graph: nx.Graph, nodes):
+    # The subgraph induced by ``nodes``, relabelled 0, ..., k-1 in that order
+    index = {node: i for i, node in enumerate(nodes)}
+    piece = nx.Graph()
+    piece.add_nodes_from(range(len(nodes)))
+    piece.add_edges_from((index[u], index[v]) for u, v in graph.subgraph(nodes).edges)
+    return piece
+
+def solve_piece(subgraph: nx.Graph, num_steps: int, lr: float, exact: bool, num_shots: int, sample_shots: int, threads: int = 1):
+    """
+    Evolve the MaxCut problem of ``subgraph`` (nodes ``0, ..., k-1``) with
+    QITE and return the bitstring with the largest cut among ``sample_shots``
+    samples of the final state, along with that cut and the final energy.
+    Local search is left to ``stitch``, which sees the whole graph.
+    """
+    ansatz = build_ansatz(subgraph)
+    qit_evolver = QITEvolver(IsingHamiltonian.from_graph(subgraph), ansatz, exact=exact)
+    qit_evolver.backend.set_options(max_parallel_threads=threads)
+    qit_evolver.num_shots = num_shots
+    qit_evolver.evolve(num_steps=num_steps, lr=lr, verbose=False)
+
+    samples = sample_states(ansatz, qit_evolver.param_vals[-1], sample_shots, qit_evolver.backend)
+    best = postprocess(subgraph, samples, top_k=0)["best"]
+    return best["bitstring"], best["cut"], qit_evolver.energies[-1]
+
+def stitch(graph: nx.Graph, pieces, piece_bitstrings):
+    """
+    Combine the piece solutions into a partition of the whole ``graph``.
+
+    Every node takes its side from the piece whose core it belongs to. Since
+    each piece solution is only defined up to swapping its two sides, pieces
+    are then flipped one at a time, in breadth-first order over pieces, to cut
+    as many edges to the pieces already placed as possible. Finally, single
+    nodes are moved greedily while that increases the cut, which repairs the
+    boundaries between cores. Returns the sides as a 0/1 array indexed by
+    node position in ``graph`` and the number of nodes moved in the last step.
+    """
+    index = {node: i for i, node in enumerate(graph)}
+    edges = np.array([(index[u], index[v]) for u, v in graph.edges], dtype=int).reshape(-1, 2)
+    sides = np.zeros(graph.number_of_nodes(), dtype=np.int8)
+    owner = np.zeros(graph.number_of_nodes(), dtype=int)
+    for p, ((core, nodes), bitstring) in enumerate(zip(pieces, piece_bitstrings)):
+        for i, node in enumerate(core):
+            sides[index[node]] = int(bitstring[i])
+            owner[index[node]] = p
+
+    # Orient the pieces against their already placed neighbours
+    cross = edges[owner[edges[:, 0]] != owner[edges[:, 1]]]
+    piece_graph = nx.Graph()
+    piece_graph.add_nodes_from(range(len(pieces)))
+    piece_graph.add_edges_from(zip(owner[cross[:, 0]], owner[cross[:, 1]]))
+    placed = np.zeros(len(pieces), dtype=bool)
+    for root in range(len(pieces)):
+        if placed[root]:
+            continue
+        for p in [root] + [v for _, v in nx.bfs_edges(piece_graph, root)]:
+            mine = owner[cross] == p
+            others = placed[owner[cross]]
+            to_placed = cross[(mine[:, 0] & others[:, 1]) | (mine[:, 1] & others[:, 0])]
+            cut = np.count_nonzero(sides[to_placed[:, 0]] != sides[to_placed[:, 1]])
+            if 2 * cut < len(to_placed):
+                sides[owner == p] ^= 1
+            placed[p] = True
+
+    # Move single nodes while that cuts more edges than it uncuts
+    moved = 0
+    while len(edges):
+        same = (sides[edges[:, 0]] == sides[edges[:, 1]]).astype(int)
+        gains = np.zeros(len(sides), dtype=int)
+        np.add.at(gains, edges[:, 0], 2 * same - 1)
+        np.add.at(gains, edges[:, 1], 2 * same - 1)
+        node = int(np.argmax(gains))
+        if gains[node] <= 0:
+            break
+        sides[node] ^= 1
+        moved += 1
+    return sides, moved
+
+def solve_decomposed(
+        graph: nx.Graph,
+        max_qubits: int = 16,
+        overlap: int = None,
+        num_steps: int = 20,
+        lr: float = 0.4,
+        exact: bool = False,
+        num_shots: int = 10000,
+        sample_shots: int = 10000,
+        processes: int = None,
+        threads: int = 1
+    ):
+    """
+    Approximate the MaxCut of a graph too large to simulate as one register:
+    split it with ``partition_graph``, evolve the pieces with QITE on a pool
+    of ``processes`` workers with ``threads`` Aer threads each, and ``stitch``
+    their solutions together.
+
+    Returns a dictionary holding the global ``bitstring`` (character ``i``
+    being the side of the ``i``-th node of ``graph``), its ``cut``, and the
+    size, cut and final energy of every piece.
+    """
+    pieces = partition_graph(graph, max_qubits, overlap)
+    subgraphs = [_piece_graph(graph, nodes) for _, nodes in pieces]
+    processes = processes or max(1, min(len(pieces), (os.cpu_count() or 1) // threads))
+    run_piece = functools.partial(
+        solve_piece, num_steps=num_steps, lr=lr, exact=exact,
+        num_shots=num_shots, sample_shots=sample_shots, threads=threads,
+    )
+    with ProcessPoolExecutor(processes) as pool:
+        results = list(pool.map(run_piece, subgraphs))
+
+    sides, moved = stitch(graph, pieces, [bitstring for bitstring, _, _ in results])
+    bitstring = "".join(map(str, sides))
+    index = {node: i for i, node in enumerate(graph)}
+    cut = sum(bitstring[index[u]] != bitstring[index[v]] for u, v in graph.edges)
+    return {
+        "bitstring": bitstring,
+        "cut": cut,
+        "num_edges": graph.number_of_edges(),
+        "pieces": [
+            {"core_size": len(core), "num_qubits": len(nodes), "cut": piece_cut, "final_energy": energy}
+            for (core, nodes), (_, piece_cut, energy) in zip(pieces, results)
+        ],
+        "moved": moved,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Approximate the MaxCut of a large graph with QITE on overlapping pieces.")
+    parser.add_argument("graph", help="graph spec, e.g. expander_graph_n:128")
+    parser.add_argument("--max-qubits", type=int, default=16)
+    parser.add_argument("--overlap", type=int, default=None, help="neighbouring nodes added to each core")
+    parser.add_argument("--num-steps", type=int, default=20)
+    parser.add_argument("--lr", type=float, default=0.4)
+    parser.add_argument("--exact", action="store_true", help="use the exact statevector mode")
+    parser.add_argument("--num-shots", type=int, default=10000)
+    parser.add_argument("--sample-shots", type=int, default=10000)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--threads", type=int, default=1, help="Aer threads per worker")
+    args = parser.parse_args(argv)
+
+    result = solve_decomposed(
+        build_graph(args.graph), args.max_qubits, args.overlap, args.num_steps, args.lr,
+        args.exact, args.num_shots, args.sample_shots, args.processes, args.threads,
+    )
+    for i, piece in enumerate(result["pieces"]):
+        print("piece {}: {core_size} core + {} halo nodes, cut {cut}, energy {final_energy:.4f}".format(
+            i, piece["num_qubits"] - piece["core_size"], **piece))
+    print("moved {} nodes while stitching".format(result["moved"]))
+    print("Cut value: {} of {} edges".format(result["cut"], result["num_edges"]))
+    print(result["bitstring"])
+
+if __name__ == "__main__":
+    main()
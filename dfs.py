@@ -18,26 +18,26 @@ class DFS():
     
     def _get_opt_edges(self) -> List:
         """Returns the list of edges along the DFS tree"""
-        visited = []
+        visited = set()
         to_opt = []
         
-        for edges in list(nx.dfs_edges(self.graph,self.start_vertex)):
+        for edges in nx.dfs_edges(self.graph,self.start_vertex):
             if edges[0] not in visited and edges[1] not in visited:
                 to_opt.append(edges)
-                visited.append(edges[0])
-                visited.append(edges[1])
+                visited.add(edges[0])
+                visited.add(edges[1])
             if edges[0] in visited and edges[1] not in visited:
                 to_opt.append(edges)
-                visited.append(edges[1])
+                visited.add(edges[1])
         
         return to_opt
     
     def _get_no_opt_edges(self, opt_edges) -> List:
-        no_opt_edges = []
-        for edge in self.graph.edges:
-            if (edge[0],edge[1]) not in opt_edges and (edge[1],edge[0]) not in opt_edges:
-                no_opt_edges.append(edge)
-        return no_opt_edges
+        """Returns the edges of the graph that are not in ``opt_edges``, in
+        the graph's edge order"""
+        opt_set = set(opt_edges)
+        opt_set.update((edge[1],edge[0]) for edge in opt_edges)
+        return [edge for edge in self.graph.edges if (edge[0],edge[1]) not in opt_set]
         
     
     def dfs_ansatz(self,optimize=True,undo_gates=True) -> QuantumCircuit:
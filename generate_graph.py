@@ -1,162 +1,148 @@
 # other graphs candidates to check
 
 import networkx as nx
-import matplotlib.pyplot as plt
 import random
 
+# Registry of graph builders by name, with how to draw each of them. Builders
+# never plot; call ``render_graph`` to look at a graph.
+GRAPHS = dict()
+
+def register(title, figsize, layout=lambda G: nx.spring_layout(G, seed=42), **draw_options):
+    """
+    Register the decorated graph builder under its name. ``title`` is
+    formatted with the builder's arguments; ``layout`` and any callable
+    ``draw_options`` are evaluated on the built graph when it is rendered.
+    """
+    def decorator(builder):
+        GRAPHS[builder.__name__] = (builder, title, figsize, layout, draw_options)
+        return builder
+    return decorator
+
+def make_graph(name: str, *args, **kwargs) -> nx.Graph:
+    """
+    Build the registered graph ``name`` with the given arguments, without
+    drawing anything.
+    """
+    builder = GRAPHS[name][0]
+    return builder(*args, **kwargs)
+
+def render_graph(name: str, G: nx.Graph, *args, **kwargs):
+    """
+    Draw the graph ``G`` built by ``make_graph(name, *args, **kwargs)`` the
+    way its builder was registered. Matplotlib is only imported here.
+    """
+    import matplotlib.pyplot as plt
+
+    _, title, figsize, layout, draw_options = GRAPHS[name]
+    draw_options = {k: v(G) if callable(v) else v for k, v in draw_options.items()}
+    axis = draw_options.pop("axis", None)
+    plt.figure(figsize=figsize)
+    nx.draw(G, layout(G), edge_color='gray', **draw_options)
+    plt.title(title.format(*args, **kwargs))
+    if axis:
+        plt.axis(axis)
+    plt.show()
+
+def _bipartite_colors(G):
+    n = G.number_of_nodes() // 2
+    return ['lightcoral'] * n + ['lightblue'] * n
+
+def _bipartite_layout(G):
+    return nx.bipartite_layout(G, nodes=range(G.number_of_nodes() // 2))
+
+def _components_layout(G):
+    pos = {}
+    shift_x = 0
+    for component in nx.connected_components(G):
+        subgraph = G.subgraph(component)
+        pos_sub = nx.circular_layout(subgraph, scale=1, center=(shift_x, 0))
+        pos.update(pos_sub)
+        shift_x += 3
+    return pos
+
 #-> Cycle Graph C8
+@register("Cycle Graph C8", (6, 6), nx.circular_layout, with_labels=True, node_color='lightblue', node_size=500)
 def cycle_graph_c8():
-    G = nx.cycle_graph(8)
-    plt.figure(figsize=(6, 6))
-    pos = nx.circular_layout(G)
-    nx.draw(G, pos, with_labels=True, node_color='lightblue', edge_color='gray', node_size=500)
-    plt.title("Cycle Graph C8")
-    plt.show()
-    return G
+    return nx.cycle_graph(8)
 
 # Path Graph P16
+@register("Path Graph P16", (12, 2), with_labels=True, node_color='lightgreen', node_size=300)
 def path_graph_p16():
-    G = nx.path_graph(16)
-    plt.figure(figsize=(12, 2))
-    pos = nx.spring_layout(G, seed=42)
-    nx.draw(G, pos, with_labels=True, node_color='lightgreen', edge_color='gray', node_size=300)
-    plt.title("Path Graph P16")
-    plt.show()
-    return G
+    return nx.path_graph(16)
 
 #-> Complete Bipartite Graph K8,8
+@register("Complete Bipartite Graph K8,8", (8, 6), _bipartite_layout,
+          with_labels=True, node_color=_bipartite_colors, node_size=300)
 def complete_bipartite_graph_k88():
-    G = nx.complete_bipartite_graph(8, 8)
-    plt.figure(figsize=(8, 6))
-    pos = nx.bipartite_layout(G, nodes=range(8))
-    nx.draw(G, pos, with_labels=True, node_color=['lightcoral'] * 8 + ['lightblue'] * 8,
-            edge_color='gray', node_size=300)
-    plt.title("Complete Bipartite Graph K8,8")
-    plt.show()
-    return G
+    return nx.complete_bipartite_graph(8, 8)
 
 #-> Complete Bipartite Graph K8,8
+@register("Complete Bipartite Graph K{0},{0}", (8, 6), _bipartite_layout,
+          with_labels=True, node_color=_bipartite_colors, node_size=300)
 def complete_bipartite_graph_k_nn(n):
-    G = nx.complete_bipartite_graph(n, n)
-    plt.figure(figsize=(8, 6))
-    pos = nx.bipartite_layout(G, nodes=range(n))
-    nx.draw(G, pos, with_labels=True, node_color=['lightcoral'] * n + ['lightblue'] * n,
-            edge_color='gray', node_size=300)
-    plt.title("Complete Bipartite Graph K{},{}".format(n,n))
-    plt.show()
-    return G
+    return nx.complete_bipartite_graph(n, n)
 
 # Star Graph S16
+@register("Star Graph S16", (8, 8), with_labels=True, node_color='gold', node_size=300)
 def star_graph_s16():
-    G = nx.star_graph(16)
-    plt.figure(figsize=(8, 8))
-    pos = nx.spring_layout(G, seed=42)
-    nx.draw(G, pos, with_labels=True, node_color='gold', edge_color='gray', node_size=300)
-    plt.title("Star Graph S16")
-    plt.show()
-    return G
+    return nx.star_graph(16)
 
 # Grid Graph 8x4
+@register("Grid Graph 8x4", (12, 6), lambda G: {node: node for node in G.nodes()},
+          with_labels=True, node_color='lightblue', node_size=300)
 def grid_graph_8x4():
-    G = nx.grid_graph(dim=[8, 4])
-    plt.figure(figsize=(12, 6))
-    pos = {node: node for node in G.nodes()}
-    nx.draw(G, pos, with_labels=True, node_color='lightblue', edge_color='gray', node_size=300)
-    plt.title("Grid Graph 8x4")
-    plt.show()
-    return G
+    return nx.grid_graph(dim=[8, 4])
 
 # Grid Graph 8x4
+@register("Grid Graph {}x{}", (12, 6), lambda G: {node: node for node in G.nodes()},
+          with_labels=True, node_color='lightblue', node_size=300)
 def grid_graph_nxm(n,m):
-    G = nx.grid_graph(dim=[n, m])
-    plt.figure(figsize=(12, 6))
-    pos = {node: node for node in G.nodes()}
-    nx.draw(G, pos, with_labels=True, node_color='lightblue', edge_color='gray', node_size=300)
-    plt.title("Grid Graph {}x{}".format(n,m))
-    plt.show()
-    return G
+    return nx.grid_graph(dim=[n, m])
 
 
 #-> 4-Regular Graph with 8 Vertices
+@register("4-Regular Graph with 8 Vertices", (6, 6), nx.circular_layout,
+          with_labels=True, node_color='lightgreen', node_size=500)
 def regular_graph_4_8():
-    G = nx.random_regular_graph(d=4, n=8, seed=42)
-    plt.figure(figsize=(6, 6))
-    pos = nx.circular_layout(G)
-    nx.draw(G, pos, with_labels=True, node_color='lightgreen', edge_color='gray', node_size=500)
-    plt.title("4-Regular Graph with 8 Vertices")
-    plt.show()
-    return G
+    return nx.random_regular_graph(d=4, n=8, seed=42)
 
 #-> Cubic (3-Regular) Graph with 16 Vertices
+@register("Cubic (3-Regular) Graph with 16 Vertices", (8, 6), with_labels=True, node_color='lightcoral', node_size=300)
 def cubic_graph_3_16():
-    G = nx.random_regular_graph(d=3, n=16, seed=42)
-    plt.figure(figsize=(8, 6))
-    pos = nx.spring_layout(G, seed=42)
-    nx.draw(G, pos, with_labels=True, node_color='lightcoral', edge_color='gray', node_size=300)
-    plt.title("Cubic (3-Regular) Graph with 16 Vertices")
-    plt.show()
-    return G
+    return nx.random_regular_graph(d=3, n=16, seed=42)
 
 # Disjoint Union of Four C4 Cycles
+@register("Disjoint Union of Four C4 Cycles", (12, 6), _components_layout,
+          with_labels=True, node_color='lightblue', node_size=300)
 def disjoint_union_c4():
     cycles = [nx.cycle_graph(4) for _ in range(4)]
-    G = nx.disjoint_union_all(cycles)
-    plt.figure(figsize=(12, 6))
-    pos = {}
-    shift_x = 0
-    for component in nx.connected_components(G):
-        subgraph = G.subgraph(component)
-        pos_sub = nx.circular_layout(subgraph, scale=1, center=(shift_x, 0))
-        pos.update(pos_sub)
-        shift_x += 3
-    nx.draw(G, pos, with_labels=True, node_color='lightblue', edge_color='gray', node_size=300)
-    plt.title("Disjoint Union of Four C4 Cycles")
-    plt.show()
-    return G
+    return nx.disjoint_union_all(cycles)
 
 # Complete Bipartite Graph K16,16
+@register("Complete Bipartite Graph K16,16", (12, 6), _bipartite_layout,
+          with_labels=False, node_color=_bipartite_colors, node_size=100)
 def complete_bipartite_graph_k1616():
-    G = nx.complete_bipartite_graph(16, 16)
-    plt.figure(figsize=(12, 6))
-    pos = nx.bipartite_layout(G, nodes=range(16))
-    nx.draw(G, pos, with_labels=False, node_color=['lightcoral'] * 16 + ['lightblue'] * 16,
-            edge_color='gray', node_size=100)
-    plt.title("Complete Bipartite Graph K16,16")
-    plt.show()
-    return G
+    return nx.complete_bipartite_graph(16, 16)
 
 # 5-Dimensional Hypercube Graph Q5
+@register("5-Dimensional Hypercube Graph Q5", (10, 8), with_labels=False, node_color='lightgreen', node_size=200)
 def hypercube_graph_q5():
-    G = nx.hypercube_graph(5)
-    plt.figure(figsize=(10, 8))
-    pos = nx.spring_layout(G, seed=42)
-    nx.draw(G, pos, with_labels=False, node_color='lightgreen', edge_color='gray', node_size=200)
-    plt.title("5-Dimensional Hypercube Graph Q5")
-    plt.show()
-    return G
+    return nx.hypercube_graph(5)
 
 # Tree Graph with 8 Vertices
+@register("Tree Graph with 8 Vertices", (8, 6), with_labels=True, node_color='lightblue', node_size=300)
 def tree_graph_8():
     G = nx.balanced_tree(r=2, h=2)
     G.add_edge(6, 7)
-    plt.figure(figsize=(8, 6))
-    pos = nx.spring_layout(G, seed=42)
-    nx.draw(G, pos, with_labels=True, node_color='lightblue', edge_color='gray', node_size=300)
-    plt.title("Tree Graph with 8 Vertices")
-    plt.show()
     return G
 
 # Wheel Graph W16
+@register("Wheel Graph W16", (8, 8), nx.circular_layout, with_labels=True, node_color='lightcoral', node_size=300)
 def wheel_graph_w16():
-    G = nx.wheel_graph(16)
-    plt.figure(figsize=(8, 8))
-    pos = nx.circular_layout(G)
-    nx.draw(G, pos, with_labels=True, node_color='lightcoral', edge_color='gray', node_size=300)
-    plt.title("Wheel Graph W16")
-    plt.show()
-    return G
+    return nx.wheel_graph(16)
 
 #-> Random Connected Graph with 16 Vertices
+@register("Random Connected Graph with 16 Vertices", (10, 8), with_labels=False, node_color='lightgreen', node_size=100)
 def random_connected_graph_16(p=0.15):
     #n, p = 16, 0.25
     n=16
@@ -164,34 +150,21 @@ def random_connected_graph_16(p=0.15):
         G = nx.erdos_renyi_graph(n, p, seed=random.randint(1, 10000))
         if nx.is_connected(G):
             break
-    plt.figure(figsize=(10, 8))
-    pos = nx.spring_layout(G, seed=42)
-    nx.draw(G, pos, with_labels=False, node_color='lightgreen', edge_color='gray', node_size=100)
-    plt.title("Random Connected Graph with 16 Vertices")
-    plt.show()
     return G
 
 # Expander Graph with 32 Vertices
+@register("Expander Graph with 32 Vertices", (10, 8), with_labels=False, node_color='lightblue', node_size=100)
 def expander_graph_32():
-    G = nx.random_regular_graph(4, 32, seed=42)
-    plt.figure(figsize=(10, 8))
-    pos = nx.spring_layout(G, seed=42)
-    nx.draw(G, pos, with_labels=False, node_color='lightblue', edge_color='gray', node_size=100)
-    plt.title("Expander Graph with 32 Vertices")
-    plt.show()
-    return G
+    return nx.random_regular_graph(4, 32, seed=42)
 
 #-> Expander Graph with n Vertices
+@register("Expander Graph with {} Vertices", (10, 8), with_labels=False, node_color='lightblue', node_size=100)
 def expander_graph_n(n):
-    G = nx.random_regular_graph(4, n, seed=42)
-    plt.figure(figsize=(10, 8))
-    pos = nx.spring_layout(G, seed=42)
-    nx.draw(G, pos, with_labels=False, node_color='lightblue', edge_color='gray', node_size=100)
-    plt.title("Expander Graph with {} Vertices".format(n))
-    plt.show()
-    return G
+    return nx.random_regular_graph(4, n, seed=42)
 
 # Planar Connected Graph with 16 Vertices
+@register("Planar Connected Graph with 16 Vertices", (16, 8), lambda G: {node: (node // 2, node % 2) for node in G.nodes()},
+          with_labels=False, node_color='lightcoral', node_size=100, axis='equal')
 def planar_connected_graph_16():
     G = nx.grid_graph(dim=[8, 2])
     G = nx.convert_node_labels_to_integers(G)
@@ -199,10 +172,4 @@ def planar_connected_graph_16():
                         (7, 15), (8, 7)]#, (6, 15), (14, 1), (1, 13), (10, 9), (0, 10), (12, 2), (8, 7)]
     G.add_edges_from([e for e in additional_edges if e[0] < 16 and e[1] < 16])
     assert nx.check_planarity(G)[0], "Graph is not planar."
-    pos = {node: (node // 2, node % 2) for node in G.nodes()}
-    plt.figure(figsize=(16, 8))
-    nx.draw(G, pos, with_labels=False, node_color='lightcoral', edge_color='gray', node_size=100)
-    plt.title("Planar Connected Graph with 16 Vertices")
-    plt.axis('equal')
-    plt.show()
-    return G
\ No newline at end of file
+    return G
@@ -0,0 +1,113 @@
+import networkx as nx
+import numpy as np
+from qiskit.quantum_info import SparsePauliOp
+
+from utils import pack_states
+
+MAX_QUBITS = 64
+MAX_DIAGONAL_QUBITS = 26
+
+class IsingHamiltonian:
+    """
+    A diagonal Hamiltonian ``offset + Σ_t coeffs[t] Z^{z_masks[t]}`` stored as
+    integer Z-masks rather than Pauli labels.
+
+    States are packed into unsigned integers whose bit ``i`` is character ``i``
+    of a Qiskit counts key (see ``utils.pack_states``), and bit ``i`` of a
+    Z-mask is character ``i`` of the corresponding Pauli label, so the sign of
+    a term on a state is the parity of ``state & mask``.
+    """
+    def __init__(self, num_qubits: int, z_masks: np.array, coeffs: np.array, offset: float = 0.0):
+        self.num_qubits = num_qubits
+        # Masks wider than 64 bits are kept as Python integers, which serve
+        # lightcone evaluation but cannot be matched against packed states
+        self.z_masks = np.asarray(z_masks, dtype=np.uint64 if num_qubits <= MAX_QUBITS else object)
+        self.coeffs = np.asarray(coeffs, dtype=float)
+        self.offset = float(offset)
+        self._diagonal = None
+
+    @classmethod
+    def from_graph(cls, graph: nx.Graph):
+        """
+        Build the MaxCut Hamiltonian H = -(|E|/2)*I + (1/2)*Σ_{(i,j)∈E}(Z_i Z_j)
+        of ``graph``, whose energy on a partition is minus its cut size.
+        """
+        z_masks = [(1 << u) | (1 << v) for u, v in graph.edges]
+        return cls(graph.number_of_nodes(), z_masks, [0.5] * len(z_masks), -graph.number_of_edges() / 2)
+
+    @classmethod
+    def from_sparse_pauli_op(cls, operator: SparsePauliOp):
+        """
+        Convert a ``SparsePauliOp`` made of ``I`` and ``Z`` terms only, folding
+        its identity terms into the offset.
+        """
+        paulis = operator.paulis
+        non_ising = np.flatnonzero(paulis.x.any(axis=1))
+        if len(non_ising):
+            raise ValueError("{} is not an Ising term".format(paulis[non_ising[0]].to_label()))
+
+        # Read the Z bits straight off the symplectic table rather than parsing
+        # labels: column q is qubit q, i.e. character n-1-q of the label
+        z = paulis.z[:, ::-1]
+        coeffs = (operator.coeffs * (-1j) ** paulis.phase).real
+        identity = ~z.any(axis=1)
+        if operator.num_qubits <= MAX_QUBITS:
+            z_masks = pack_states(z[~identity])
+        else:
+            z_masks = [int.from_bytes(np.packbits(row, bitorder="little").tobytes(), "little") for row in z[~identity]]
+        return cls(operator.num_qubits, z_masks, coeffs[~identity], coeffs[identity].sum())
+
+    def to_sparse_pauli_op(self) -> SparsePauliOp:
+        """
+        Convert back to a ``SparsePauliOp``, identity term first.
+        """
+        n = self.num_qubits
+        terms = [("", [], self.offset)]
+        for mask, coeff in zip(self.z_masks.tolist(), self.coeffs):
+            qubits = list()
+            while mask:
+                qubits.append(n - mask.bit_length())
+                mask &= ~(1 << (mask.bit_length() - 1))
+            terms.append(("Z" * len(qubits), qubits, coeff))
+        return SparsePauliOp.from_sparse_list(terms, n)
+
+    def parities(self, states: np.array):
+        """
+        Get the parity of every term on every one of the packed ``states``, as
+        a (number of states, number of terms) 0/1 matrix.
+        """
+        if self.num_qubits > MAX_QUBITS:
+            raise ValueError("States of a {}-qubit Hamiltonian do not fit in 64 bits".format(self.num_qubits))
+        return np.bitwise_count(np.asarray(states, dtype=np.uint64)[:, None] & self.z_masks) & 1
+
+    def energies(self, states: np.array):
+        """
+        Get the energies of the packed ``states``, read off the diagonal if it
+        has been cached.
+        """
+        if self._diagonal is not None:
+            return self._diagonal[np.asarray(states, dtype=np.int64)]
+        return self.offset + (1 - 2 * self.parities(states).astype(int)) @ self.coeffs
+
+    def diagonal(self):
+        """
+        Get the energies of all ``2**num_qubits`` packed states, computing and
+        caching the table on the first call. Every later call to ``energies``
+        is then a lookup.
+        """
+        if self._diagonal is None:
+            if self.num_qubits > MAX_DIAGONAL_QUBITS:
+                raise ValueError("Diagonal of a {}-qubit Hamiltonian is too large to cache".format(self.num_qubits))
+
+            # Double the table one qubit at a time, adding the terms whose
+            # highest qubit is the new one
+            diagonal = np.full(1, self.offset)
+            for k in range(self.num_qubits):
+                low = np.arange(2**k, dtype=np.uint64)
+                contribution = np.zeros(2**k)
+                for mask, coeff in zip(self.z_masks, self.coeffs):
+                    if int(mask).bit_length() - 1 == k:
+                        contribution += coeff * (1 - 2 * (np.bitwise_count(low & mask) & 1).astype(int))
+                diagonal = np.concatenate([diagonal + contribution, diagonal - contribution])
+            self._diagonal = diagonal
+        return self._diagonal
@@ -0,0 +1,185 @@
+import numpy as np
+from qiskit import QuantumCircuit
+from qiskit.circuit import Parameter
+
+from ising import IsingHamiltonian
+
+MAX_CONE_QUBITS = 20
+
+# Gates that commute with any Z-string
+DIAGONAL_GATES = {"z", "s", "sdg", "t", "tdg", "rz", "p", "cz", "rzz", "cp", "crz"}
+
+class LightconeEstimator:
+    """
+    Exact Z-string expectation values of the state prepared by ``ansatz``,
+    each computed by simulating only its causal lightcone.
+
+    The lightcone of an observable is the part of the circuit that can reach
+    its qubits: walking the gates backwards, a gate belongs to it if it acts
+    on the support of the observable conjugated by the later gates (see
+    ``cone``). When every cone is a handful of qubits, as for the DFS ansatz
+    on paths and stars or the coloring ansatz on cycles and ladders, the cost
+    of a QITE step grows with the number of edges rather than exponentially
+    with the number of nodes, and graphs wider than the simulator can be
+    evolved. Otherwise ``cone`` raises ``ValueError``: e.g. the CX ladder of
+    the DFS ansatz spreads a Z over the earlier nodes of the ladder, so on a
+    graph with cycles, whose extra edges put non-diagonal gates on the
+    ladder, some cones span most of it.
+
+    The cone of every observable is extracted once. Expectation values are
+    cached by cone shape, i.e. by the gates of the cone with their parameter
+    values, so terms with identical cones (e.g. the same term on circuits that
+    differ in a parameter outside its cone) are simulated only once.
+
+    Like ``IsingHamiltonian``, bit ``i`` of a Z-mask acts on character ``i``
+    of a counts key, i.e. on qubit ``n-1-i`` of ``ansatz``.
+    """
+    def __init__(self, ansatz: QuantumCircuit, ising: IsingHamiltonian, max_cone_qubits: int = MAX_CONE_QUBITS):
+        self.ansatz = ansatz
+        self.ising = ising
+        self.max_cone_qubits = max_cone_qubits
+        self.parameters = list(ansatz.parameters)
+        param_index = {param: i for i, param in enumerate(self.parameters)}
+
+        # Every gate as (operation, qubit indices, index of its parameter or None)
+        self.gates = list()
+        for instruction in ansatz.data:
+            if instruction.operation.name == "barrier":
+                continue
+            qubits = tuple(ansatz.find_bit(q).index for q in instruction.qubits)
+            params = instruction.operation.params
+            if len(params) > 1 or (params and not isinstance(params[0], (Parameter, float, int))):
+                raise ValueError("Unsupported gate {} in ansatz".format(instruction.operation.name))
+            slot = param_index[params[0]] if params and isinstance(params[0], Parameter) else None
+            self.gates.append((instruction.operation, qubits, slot))
+
+        self._cones = dict()
+        self._values = dict()
+        self._matrices = dict()
+
+        # Pairs of terms whose cones overlap, the only ones whose product is
+        # not the product of their expectations
+        term_qubits = [set(self.cone(int(mask))[1]) for mask in ising.z_masks]
+        terms_at = dict()
+        for t, qubits in enumerate(term_qubits):
+            for q in qubits:
+                terms_at.setdefault(q, set()).add(t)
+        self.pairs = sorted({
+            (s, t) for s, qubits in enumerate(term_qubits) for q in qubits for t in terms_at[q] if s < t
+        })
+
+    def cone(self, mask: int):
+        """
+        Get the lightcone of the Z-string ``mask``: the indices of its gates
+        in ``self.gates``, in circuit order, and its qubits, sorted.
+
+        Walking backwards, the cone tracks the support of the observable
+        conjugated by the gates seen so far: the qubits where it is a Z (while
+        it is a Z-string there) and those where it is anything else. Gates
+        outside the support, and diagonal gates off its non-Z part, commute
+        with it and are left out. A CX between Z-string qubits maps the string
+        to a Z-string, toggling the control in or out when the target is a Z,
+        so e.g. ``Z_c Z_t`` becomes ``Z_t`` and the control drops out. The
+        qubits of the cone are those of the observable and of its gates.
+        """
+        if mask not in self._cones:
+            n = self.ansatz.num_qubits
+            qubits = {n - 1 - i for i in range(n) if mask >> i & 1}
+            z_support, other_support = set(qubits), set()
+            gates = list()
+            for g in range(len(self.gates) - 1, -1, -1):
+                operation, gate_qubits, _ = self.gates[g]
+                if z_support.isdisjoint(gate_qubits) and other_support.isdisjoint(gate_qubits):
+                    continue
+                if operation.name in DIAGONAL_GATES and other_support.isdisjoint(gate_qubits):
+                    continue
+                if operation.name == "cx" and other_support.isdisjoint(gate_qubits):
+                    control, target = gate_qubits
+                    if target not in z_support:
+                        continue
+                    z_support ^= {control}
+                    qubits.add(control)
+                    gates.append(g)
+                    continue
+                qubits.update(gate_qubits)
+                other_support.update(gate_qubits)
+                z_support.difference_update(gate_qubits)
+                gates.append(g)
+            if len(qubits) > self.max_cone_qubits:
+                raise ValueError("Lightcone of {} qubits exceeds max_cone_qubits".format(len(qubits)))
+            self._cones[mask] = (gates[::-1], sorted(qubits))
+        return self._cones[mask]
+
+    def expectation(self, mask: int, params: np.array):
+        """
+        Get the exact expectation value of the Z-string ``mask`` on the state
+        prepared by ``ansatz`` at ``params``.
+        """
+        if mask == 0:
+            return 1.0
+        gates, qubits = self.cone(mask)
+        local = {q: i for i, q in enumerate(qubits)}
+        n = self.ansatz.num_qubits
+        observed = tuple(local[n - 1 - i] for i in range(n) if mask >> i & 1)
+        shape = tuple(
+            (operation.name, tuple(local[q] for q in gate_qubits),
+             float(params[slot]) if slot is not None else float(operation.params[0]) if operation.params else None)
+            for operation, gate_qubits, slot in (self.gates[g] for g in gates)
+        )
+        key = (len(qubits), shape, observed)
+        if key not in self._values:
+            self._values[key] = self._simulate(len(qubits), [self.gates[g] for g in gates], shape, observed)
+        return self._values[key]
+
+    def term_means(self, params: np.array):
+        """
+        Get the expectation value of every term of ``self.ising`` at ``params``.
+        """
+        return np.array([self.expectation(int(mask), params) for mask in self.ising.z_masks])
+
+    def defining_ode(self, iter_params: np.array):
+        """
+        Construct the dynamics matrix, load vector and energy of the varQITE
+        iteration from the rows of ``QITEvolver.get_iteration_params``, as
+        ``QITEvolver.get_defining_ode`` does from the measured circuits.
+
+        The load vector needs ``<(H - E) Z_t>``, i.e. the connected correlator
+        of every pair of terms, which vanishes unless their cones overlap.
+        """
+        self._values.clear()
+        term_means = np.stack([self.term_means(params) for params in iter_params])
+        Gmat = (term_means[1::2] - term_means[2::2]).T
+
+        means, coeffs, masks = term_means[0], self.ising.coeffs, self.ising.z_masks
+        curr_energy = self.ising.offset + means @ coeffs
+        covariance = coeffs * (1 - means**2)
+        for s, t in self.pairs:
+            connected = self.expectation(int(masks[s] ^ masks[t]), iter_params[0]) - means[s] * means[t]
+            covariance[t] += coeffs[s] * connected
+            covariance[s] += coeffs[t] * connected
+        return Gmat, -covariance, curr_energy
+
+    def _simulate(self, num_qubits: int, gates, shape, observed):
+        # Statevector of the cone, one tensor axis per qubit, starting in |0...0>
+        state = np.zeros((2,) * num_qubits, dtype=complex)
+        state[(0,) * num_qubits] = 1
+        for (operation, _, _), (name, qubits, value) in zip(gates, shape):
+            matrix = self._matrix(operation, value).reshape((2,) * (2 * len(qubits)))
+            # Qiskit matrices are little-endian: the last row index is the first qubit
+            axes = list(qubits[::-1])
+            state = np.tensordot(matrix, state, axes=(list(range(len(qubits), 2 * len(qubits))), axes))
+            state = np.moveaxis(state, list(range(len(qubits))), axes)
+        probabilities = np.abs(state) ** 2
+        signs = np.ones((2,) * num_qubits)
+        for q in observed:
+            signs = signs * np.array([1, -1]).reshape([2 if axis == q else 1 for axis in range(num_qubits)])
+        return float(np.sum(probabilities * signs))
+
+    def _matrix(self, operation, value):
+        key = (operation.name, value)
+        if key not in self._matrices:
+            if operation.params:
+                operation = operation.copy()
+                operation.params = [value]
+            self._matrices[key] = operation.to_matrix()
+        return self._matrices[key]
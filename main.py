@@ -1,13 +1,14 @@
 import time
 
-from build_graph import build_ansatz, build_maxcut_hamiltonian
+from build_graph import build_ansatz
+from ising import IsingHamiltonian
 from varQITE import QITEvolver
 from check import build_solution
 
-from generate_graph import cycle_graph_c8, complete_bipartite_graph_k88, complete_bipartite_graph_k_nn, regular_graph_4_8, cubic_graph_3_16, random_connected_graph_16, expander_graph_n
+from generate_graph import cycle_graph_c8, complete_bipartite_graph_k88, complete_bipartite_graph_k_nn, regular_graph_4_8, cubic_graph_3_16, random_connected_graph_16, expander_graph_n, render_graph
 
 def main():
-    # show graph
+    # build graphs
     graph1 = cycle_graph_c8() 
     graph2 = complete_bipartite_graph_k88() 
     graph3 = complete_bipartite_graph_k_nn(5) 
@@ -19,7 +20,8 @@ def main():
 
     # input graph
     graph = graph4
-    ham = build_maxcut_hamiltonian(graph)
+    render_graph("regular_graph_4_8", graph)
+    ham = IsingHamiltonian.from_graph(graph)
     ansatz = build_ansatz(graph)
 
     start_time = time.time()
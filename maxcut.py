@@ -0,0 +1,174 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import networkx as nx
+import numpy as np
+
+CHALLENGES = ("base", "balanced", "connected")
+
+def exhaustive_maxcut(graph: nx.Graph, low_bits: int = 20, processes: int = None):
+    """
+    Find every optimal partition of ``graph`` for the base, balanced and
+    connected MaxCut challenges by exhaustive search. The nodes of ``graph``
+    are assumed to be labelled ``0, ..., n-1``.
+
+    Node ``n-1`` is pinned to side 0, since a partition and its complement cut
+    the same edges. The remaining assignments are split into blocks of
+    ``2**low_bits`` masks sharing their high bits: the cut values of a whole
+    block are NumPy arrays, and consecutive blocks are visited in Gray-code
+    order so that moving to the next block flips a single node and costs one
+    array update. Blocks are spread over ``processes`` worker processes.
+    Connectivity is only tested, with a bitmask flood fill, for partitions
+    whose cut can still beat the best connected one found so far and whose
+    sides hold enough edges to be connected.
+
+    Returns a dictionary mapping each challenge to its optimal cut value and
+    the sorted list of optimal bitstrings, whose character ``i`` is the side of
+    node ``i``. Challenges without any feasible partition get ``(None, [])``.
+    """
+    n = graph.number_of_nodes()
+    adj = [0] * n
+    for u, v in graph.edges:
+        if u != v:
+            adj[u] |= 1 << v
+            adj[v] |= 1 << u
+
+    num_low = min(low_bits, n - 1)
+    num_blocks = 2**(n - 1 - num_low)
+    processes = min(processes or os.cpu_count(), num_blocks)
+    chunks = np.linspace(0, num_blocks, processes + 1, dtype=int)
+    tasks = [(adj, num_low, lo, hi) for lo, hi in zip(chunks[:-1], chunks[1:]) if lo < hi]
+    if len(tasks) > 1:
+        with ProcessPoolExecutor(len(tasks)) as pool:
+            partials = list(pool.map(_search_blocks, *zip(*tasks)))
+    else:
+        partials = [_search_blocks(*task) for task in tasks]
+
+    # Merge the workers' optima and add back the complement of every solution
+    full = (1 << n) - 1
+    solutions = dict()
+    for c, challenge in enumerate(CHALLENGES):
+        best = max((p[c][0] for p in partials if p[c][1]), default=None)
+        masks = [b for p in partials if p[c][0] == best for b in p[c][1]]
+        masks = sorted(masks + [full ^ b for b in masks])
+        solutions[challenge] = (best, [format(b, "0{}b".format(n))[::-1] for b in masks])
+    return solutions
+
+def _search_blocks(adj: list, num_low: int, start: int, stop: int):
+    """
+    Scan the blocks with Gray-code indices ``start`` to ``stop`` and return the
+    best cut value and optimal masks found for each challenge.
+    """
+    n = len(adj)
+    low = np.arange(2**num_low, dtype=np.uint64)
+    low_mask = (1 << num_low) - 1
+    high_nodes = range(num_low, n)
+
+    # Cut values among the low nodes, doubling the table one node at a time
+    low_cuts = np.zeros(1, dtype=np.int32)
+    for k in range(num_low):
+        earlier = adj[k] & ((1 << k) - 1)
+        earlier_nbrs = np.bitwise_count(low[:2**k] & np.uint64(earlier)).astype(np.int32)
+        low_cuts = np.concatenate([low_cuts + earlier_nbrs, low_cuts + bin(earlier).count("1") - earlier_nbrs])
+
+    # Number of neighbours of each high node on side 1 among the low nodes
+    low_nbrs = {u: np.bitwise_count(low & np.uint64(adj[u] & low_mask)).astype(np.int32) for u in high_nodes}
+    low_pops = np.bitwise_count(low).astype(np.int32)
+    degrees = [bin(a).count("1") for a in adj]
+    low_degrees = sum(degrees[k] * ((low >> np.uint64(k)) & np.uint64(1)).astype(np.int32) for k in range(num_low))
+    balanced_sizes = [n // 2, (n + 1) // 2]
+
+    # Both sides of a connected partition contain a spanning tree, so at most
+    # |E| - (n - 2) edges can be cut
+    num_edges = sum(degrees) // 2
+    bound = num_edges - (n - 2)
+
+    # Cut values of the first block, computed directly
+    high = start ^ (start >> 1)
+    x = high << num_low
+    cuts = low_cuts.copy()
+    for u in high_nodes:
+        degree_low = bin(adj[u] & low_mask).count("1")
+        cuts += degree_low - low_nbrs[u] if x >> u & 1 else low_nbrs[u]
+        cuts += sum(1 for v in high_nodes if v < u and adj[u] >> v & 1 and (x >> u & 1) != (x >> v & 1))
+
+    best = {challenge: (-1, []) for challenge in CHALLENGES}
+    for g in range(start, stop):
+        if g > start:
+            # Flip the single high node that changes between consecutive Gray codes
+            u = num_low + (g & -g).bit_length() - 1
+            side = -1 if x >> u & 1 else 1
+            x ^= 1 << u
+            high_nbrs = bin(adj[u] & x & ~low_mask).count("1")
+            cuts += side * (bin(adj[u]).count("1") - 2 * high_nbrs - 2 * low_nbrs[u])
+
+        # The all-zeros partition leaves one side empty
+        block = cuts
+        if x == 0:
+            block = cuts.copy()
+            block[0] = -1
+
+        _update_best(best, "base", block, x)
+        sizes = low_pops + bin(x).count("1")
+        _update_best(best, "balanced", np.where(np.isin(sizes, balanced_sizes), block, -1), x)
+
+        # Edges inside side 1 follow from its degree sum and the cut value
+        inner = (low_degrees + sum(d for u, d in enumerate(degrees) if x >> u & 1) - block) // 2
+        outer = num_edges - block - inner
+        spanning = (inner >= sizes - 1) & (outer >= n - sizes - 1)
+        _update_connected(best, adj, np.where(spanning, block, -1), x, bound)
+
+    return [(best[challenge][0], best[challenge][1]) for challenge in CHALLENGES]
+
+def _update_best(best: dict, challenge: str, block: np.array, offset: int):
+    """
+    Fold the optimal masks of ``block`` (cut values of masks ``offset + i``,
+    infeasible ones set to -1) into ``best[challenge]``.
+    """
+    block_best = block.max()
+    best_cut, masks = best[challenge]
+    if block_best < 0 or block_best < best_cut:
+        return
+    if block_best > best_cut:
+        best_cut, masks = block_best, []
+    masks += [offset + int(i) for i in np.flatnonzero(block == block_best)]
+    best[challenge] = (int(best_cut), masks)
+
+def _update_connected(best: dict, adj: list, block: np.array, offset: int, bound: int):
+    """
+    Fold the best partitions of ``block`` whose two sides both induce connected
+    subgraphs into ``best["connected"]``, where partitions that leave a side
+    with too few edges for a spanning tree are already set to -1. Only cut
+    values between the best connected cut found so far and ``bound`` can still
+    improve on it; those levels are tested from the top down, stopping at the
+    first one holding a connected partition.
+    """
+    best_cut, masks = best["connected"]
+    full = np.uint64((1 << len(adj)) - 1)
+    for cut in range(min(int(block.max()), bound), max(best_cut, 0) - 1, -1):
+        candidates = np.flatnonzero(block == cut)
+        if len(candidates) == 0:
+            continue
+        sides = np.uint64(offset) + candidates.astype(np.uint64)
+        connected = connected_sides(sides, adj) & connected_sides(full ^ sides, adj)
+        if connected.any():
+            if cut > best_cut:
+                best_cut, masks = cut, []
+            masks += [offset + int(i) for i in candidates[connected]]
+            break
+    best["connected"] = (best_cut, masks)
+
+def connected_sides(sides: np.array, adj: list):
+    """
+    Check, for each vertex set in ``sides`` (given as bitmasks over the nodes),
+    whether it induces a connected subgraph of the graph whose neighbourhoods
+    are the bitmasks ``adj``. Runs a bitmask flood fill from the lowest member
+    of every set at once; empty sets count as connected.
+    """
+    reach = sides & (~sides + np.uint64(1))
+    while True:
+        prev = reach
+        for v, nbrs in enumerate(adj):
+            reach = reach | ((reach & np.uint64(nbrs)) != 0) * (sides & np.uint64(1 << v))
+        if (reach == prev).all():
+            return reach == sides
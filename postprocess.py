@@ -0,0 +1,103 @@
+import networkx as nx
+import numpy as np
+
+from utils import format_states, pack_states, unpack_states
+
+def edge_index(graph: nx.Graph):
+    """
+    Get the edges of ``graph``, whose nodes are labelled ``0, ..., n-1``, as a
+    (number of edges, 2) integer array.
+    """
+    return np.array(graph.edges, dtype=np.int64).reshape(-1, 2)
+
+def cut_sizes(edges: np.array, states: np.array, num_nodes: int):
+    """
+    Get the cut size of each of the packed ``states`` (bit ``i`` being the
+    side of node ``i``) on the graph of ``num_nodes`` nodes with the given
+    ``edges``, all at once.
+    """
+    bits = unpack_states(states, num_nodes)
+    return np.count_nonzero(bits[:, edges[:, 0]] != bits[:, edges[:, 1]], axis=1)
+
+def refine(edges: np.array, num_nodes: int, bits: np.array, max_flips: int = 2):
+    """
+    Improve a batch of partitions by greedy local search, all at once.
+
+    ``bits`` is a (number of partitions, ``num_nodes``) 0/1 matrix. With the
+    sides as spins ``s``, flipping node ``i`` gains ``g_i = s_i (A s)_i`` cut
+    edges and flipping nodes ``i`` and ``j`` gains ``g_i + g_j - 2 s_i s_j A_ij``,
+    ``A`` being the adjacency matrix. At every round, each partition makes its
+    best move of one node or, if ``max_flips`` is 2 and that gains more, two
+    nodes, until no move increases its cut. Returns the refined partitions and
+    the number of moves each made.
+    """
+    loops = edges[:, 0] == edges[:, 1]
+    adjacency = np.zeros((num_nodes, num_nodes), dtype=np.int64)
+    np.add.at(adjacency, (edges[~loops, 0], edges[~loops, 1]), 1)
+    adjacency += adjacency.T
+    pairs = ~np.eye(num_nodes, dtype=bool)
+
+    spins = 1 - 2 * np.asarray(bits, dtype=np.int64)
+    moves = np.zeros(len(spins), dtype=int)
+    active = np.arange(len(spins))
+    while len(active):
+        s = spins[active]
+        gains = s * (s @ adjacency)
+        flips = np.zeros_like(s, dtype=bool)
+        best = gains.argmax(axis=1)
+        best_gain = gains[np.arange(len(s)), best]
+        flips[np.arange(len(s)), best] = True
+        if max_flips >= 2 and num_nodes > 1:
+            pair_gains = gains[:, :, None] + gains[:, None, :] - 2 * s[:, :, None] * s[:, None, :] * adjacency
+            pair_gains = np.where(pairs, pair_gains, np.iinfo(np.int64).min)
+            i, j = np.unravel_index(pair_gains.reshape(len(s), -1).argmax(axis=1), pairs.shape)
+            pair_gain = pair_gains[np.arange(len(s)), i, j]
+            use_pair = pair_gain > best_gain
+            flips[use_pair] = False
+            flips[use_pair, i[use_pair]] = flips[use_pair, j[use_pair]] = True
+            best_gain = np.maximum(best_gain, pair_gain)
+
+        improving = best_gain > 0
+        spins[active[improving]] = np.where(flips[improving], -s[improving], s[improving])
+        moves[active[improving]] += 1
+        active = active[improving]
+    return ((1 - spins) // 2).astype(np.uint8), moves
+
+def postprocess(graph: nx.Graph, samples: np.array, top_k: int = 32, max_flips: int = 2):
+    """
+    Extract partitions of ``graph`` (nodes labelled ``0, ..., n-1``) from the
+    distinct ``samples`` of a QITE state, a records array of packed states
+    and counts as returned by ``check.sample_states``.
+
+    The cuts of all samples are evaluated at once. The ``top_k`` samples with
+    the largest cuts, most likely first among equal cuts, are then improved
+    together by ``refine``, unless ``top_k`` is 0. Returns a dictionary
+    holding the ``best`` and ``most_likely`` sampled partitions and the best
+    ``improved`` one, each as a dictionary of its ``bitstring`` (character
+    ``i`` being the side of node ``i``), ``cut`` and sampled ``count``, along
+    with the ``cuts`` of all samples.
+    """
+    n = graph.number_of_nodes()
+    edges = edge_index(graph)
+    states, counts = samples["states"], samples["counts"]
+    cuts = cut_sizes(edges, states, n)
+
+    order = np.lexsort((-counts, -cuts))
+    improved_state, improved_cut = states[order[0]], cuts[order[0]]
+    if top_k > 0:
+        refined, _ = refine(edges, n, unpack_states(states[order[:top_k]], n), max_flips)
+        refined_states = pack_states(refined)
+        refined_cuts = cut_sizes(edges, refined_states, n)
+        improved = int(np.argmax(refined_cuts))
+        improved_state, improved_cut = refined_states[improved], refined_cuts[improved]
+
+    def partition(state, cut, count):
+        return {"bitstring": format_states([state], n)[0], "cut": int(cut), "count": int(count)}
+
+    most_likely = int(np.argmax(counts))
+    return {
+        "best": partition(states[order[0]], cuts[order[0]], counts[order[0]]),
+        "most_likely": partition(states[most_likely], cuts[most_likely], counts[most_likely]),
+        "improved": partition(improved_state, improved_cut, counts[states == improved_state].sum()),
+        "cuts": cuts,
+    }
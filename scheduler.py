@@ -0,0 +1,51 @@
+import asyncio
+from typing import Callable, List
+
+from varQITE import QITEvolver
+
+async def evolve_async(
+        qit_evolver: QITEvolver,
+        num_steps: int,
+        lr: float = 0.4,
+        callback: Callable[[dict], None] = None
+    ):
+    """
+    Evolve ``qit_evolver`` as ``QITEvolver.evolve`` does, but hand control
+    back to the event loop while each step's circuits are simulating.
+    """
+    loop = asyncio.get_running_loop()
+    for job in qit_evolver.evolve_steps(num_steps, lr, callback=callback):
+        await loop.run_in_executor(None, job.result)
+    return qit_evolver
+
+async def evolve_all_async(
+        qit_evolvers: List[QITEvolver],
+        num_steps: int,
+        lr: float = 0.4,
+        callback: Callable[[int, dict], None] = None
+    ):
+    """
+    Interleave the evolution of several independent ``qit_evolvers``: while
+    one of them assembles and solves its defining ODE, the circuits of the
+    others keep simulating in Aer's threads. ``callback``, if given, is called
+    with the index of the evolver and its step dictionary.
+    """
+    def run_callback(i):
+        return None if callback is None else lambda step: callback(i, step)
+
+    return await asyncio.gather(*(
+        evolve_async(qit_evolver, num_steps, lr, run_callback(i))
+        for i, qit_evolver in enumerate(qit_evolvers)
+    ))
+
+def evolve_all(
+        qit_evolvers: List[QITEvolver],
+        num_steps: int,
+        lr: float = 0.4,
+        callback: Callable[[int, dict], None] = None
+    ):
+    """
+    Blocking entry point to ``evolve_all_async``. Every evolver ends up with
+    the same results as if evolved on its own.
+    """
+    return asyncio.run(evolve_all_async(qit_evolvers, num_steps, lr, callback))
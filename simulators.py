@@ -0,0 +1,170 @@
+import numpy as np
+from qiskit import QuantumCircuit
+from qiskit_aer import AerSimulator
+
+# Default caps for ``select_backend``
+DEFAULT_MAX_MEMORY = 8 * 2**30
+DEFAULT_MAX_SECONDS = None
+
+# Order-of-magnitude throughputs of Aer on one core, used to compare methods:
+# seconds per amplitude touched by a statevector gate and per sampled shot,
+# per chi^3 flops of an MPS two-qubit gate, per chi^2 bond of a shot and per
+# amplitude and chi^2 bond when extracting an exact distribution from an MPS
+STATEVECTOR_SECONDS = 3e-9
+STATEVECTOR_SHOT_SECONDS = 3e-6
+MPS_SECONDS = 2e-8
+MPS_SHOT_SECONDS = 8e-7
+MPS_AMPLITUDE_SECONDS = 1.5e-8
+
+# Widest circuits each method of Aer accepts
+MAX_QUBITS = {"statevector": 28, "matrix_product_state": 63, "stabilizer": 10000}
+
+CLIFFORD_GATES = {"h", "x", "y", "z", "s", "sdg", "cx", "cz", "swap", "id", "barrier", "measure"}
+ROTATION_GATES = {"rx", "ry", "rz"}
+
+def is_clifford(circuit: QuantumCircuit) -> bool:
+    """
+    Tell whether ``circuit`` is bound and made of Clifford gates only,
+    rotations by multiples of pi/2 included.
+    """
+    if circuit.num_parameters:
+        return False
+    for instruction in circuit.data:
+        operation = instruction.operation
+        if operation.name in ROTATION_GATES:
+            if not np.isclose(np.round(2 * float(operation.params[0]) / np.pi), 2 * float(operation.params[0]) / np.pi):
+                return False
+        elif operation.name not in CLIFFORD_GATES:
+            return False
+    return True
+
+def bond_dimension_bounds(circuit: QuantumCircuit):
+    """
+    Bound the MPS bond dimension of the state prepared by ``circuit`` across
+    each of the ``n-1`` cuts between qubits ``k`` and ``k+1``, starting from a
+    product state.
+
+    Every two-qubit gate spanning a cut can at most double the Schmidt rank
+    across it, and a CX-RY-CX sandwich on one pair, as ``Circuit`` emits for
+    every edge, counts as a single gate since it is a ZY rotation. The rank
+    is also at most ``2**min(k+1, n-k-1)``. Returns the base-2 logarithms of
+    the bounds.
+    """
+    n = circuit.num_qubits
+    crossings = np.zeros(n + 1, dtype=int)
+    last = [None] * n   # last gate on each qubit, as (name, qubits, index)
+    opened = set()      # indices of CX gates opening a CX-RY-CX sandwich
+    for i, instruction in enumerate(circuit.data):
+        qubits = tuple(circuit.find_bit(q).index for q in instruction.qubits)
+        name = instruction.operation.name
+        if len(qubits) == 2:
+            u, v = qubits
+            sandwich = (
+                name == "cx" and last[v] is not None and last[v][0] == "ry" and last[v][1] == (v,)
+                and last[u] is not None and last[u][2] in opened and last[u][1] == qubits
+                and last[v][3] == last[u][2]
+            )
+            if not sandwich:
+                crossings[min(u, v)] += 1
+                crossings[max(u, v)] -= 1
+                opened.add(i)
+        for q in qubits:
+            previous = last[q][2] if last[q] is not None else None
+            last[q] = (name, qubits, i, previous)
+    log_bounds = np.cumsum(crossings)[:n - 1]
+    return np.minimum(log_bounds, np.minimum(np.arange(1, n), np.arange(n - 1, 0, -1)))
+
+def estimate_costs(circuit: QuantumCircuit, shots: int = 1, exact: bool = False, max_bond_dimension: int = None):
+    """
+    Estimate the memory (bytes) and run time (seconds) of simulating
+    ``circuit`` and sampling it ``shots`` times with each Aer method that can
+    run it, as a dictionary keyed by method. Matrix-product-state estimates
+    use ``bond_dimension_bounds``, capped at ``max_bond_dimension`` if given,
+    in which case the simulation is approximate. Exact distributions over all ``2**n`` states are only
+    available for circuits of at most 26 qubits, and extracting one from a
+    matrix product state costs about ``2**n`` times the squared bonds.
+    """
+    n = circuit.num_qubits
+    num_gates = sum(1 for instruction in circuit.data if instruction.operation.name not in ("barrier", "measure"))
+    costs = dict()
+
+    if n <= MAX_QUBITS["statevector"]:
+        seconds = STATEVECTOR_SECONDS * num_gates * 2.0**n + STATEVECTOR_SHOT_SECONDS * shots
+        costs["statevector"] = {"memory": 16 * 2.0**n, "seconds": seconds}
+
+    log_chi = bond_dimension_bounds(circuit).astype(float)
+    if max_bond_dimension is not None:
+        log_chi = np.minimum(log_chi, np.log2(max_bond_dimension))
+    chi = np.concatenate([[1.0], 2.0**log_chi, [1.0]])
+    if n <= MAX_QUBITS["matrix_product_state"]:
+        two_qubit = [
+            sorted(circuit.find_bit(q).index for q in instruction.qubits)
+            for instruction in circuit.data if len(instruction.qubits) == 2
+        ]
+        seconds = sum(MPS_SECONDS * (v - u) * chi[u + 1:v + 1].max()**3 for u, v in two_qubit)
+        seconds += MPS_SHOT_SECONDS * shots * float(np.sum(chi[1:-1]**2))
+        costs["matrix_product_state"] = {"memory": 16 * 2 * float(np.sum(chi[:-1] * chi[1:])), "seconds": seconds}
+
+    if is_clifford(circuit) and not exact:
+        costs["stabilizer"] = {"memory": n * n / 4, "seconds": 1e-8 * (num_gates + shots) * n}
+
+    if exact:
+        for method in list(costs):
+            if n > 26:
+                del costs[method]
+            else:
+                costs[method]["memory"] += 8 * 2.0**n
+        if "matrix_product_state" in costs:
+            costs["matrix_product_state"]["seconds"] += MPS_AMPLITUDE_SECONDS * 2.0**n * float(np.sum(chi[1:-1]**2))
+    return costs
+
+def select_method(
+        circuit: QuantumCircuit,
+        shots: int = 1,
+        exact: bool = False,
+        max_memory: float = DEFAULT_MAX_MEMORY,
+        max_seconds: float = DEFAULT_MAX_SECONDS,
+        max_bond_dimension: int = None
+    ) -> str:
+    """
+    Pick the fastest Aer method to run ``circuit`` for ``shots`` shots whose
+    estimated memory and run time fit in ``max_memory`` bytes and ``max_seconds`` seconds, raising
+    ``ValueError`` if there is none.
+    """
+    costs = estimate_costs(circuit, shots, exact, max_bond_dimension)
+    feasible = {
+        method: cost for method, cost in costs.items()
+        if cost["memory"] <= max_memory and (max_seconds is None or cost["seconds"] <= max_seconds)
+    }
+    if not costs and exact and circuit.num_qubits > 26:
+        raise ValueError(
+            "Exact distributions are only available for circuits of at most 26 "
+            "qubits, got {}".format(circuit.num_qubits)
+        )
+    if not costs:
+        raise ValueError("No simulation method supports {} qubits".format(circuit.num_qubits))
+    if not feasible:
+        raise ValueError(
+            "No simulation method fits the memory and time caps, consider "
+            "max_bond_dimension: {}".format(costs)
+        )
+    return min(feasible, key=lambda method: feasible[method]["seconds"])
+
+def select_backend(
+        circuit: QuantumCircuit,
+        shots: int = 1,
+        exact: bool = False,
+        max_memory: float = DEFAULT_MAX_MEMORY,
+        max_seconds: float = DEFAULT_MAX_SECONDS,
+        max_bond_dimension: int = None
+    ) -> AerSimulator:
+    """
+    Get an ``AerSimulator`` running ``select_method``'s choice for
+    ``circuit``, with Aer's own memory cap set to ``max_memory`` and, for a
+    matrix product state, bonds truncated at ``max_bond_dimension``.
+    """
+    method = select_method(circuit, shots, exact, max_memory, max_seconds, max_bond_dimension)
+    backend = AerSimulator(method=method, max_memory_mb=int(max_memory // 2**20))
+    if method == "matrix_product_state" and max_bond_dimension is not None:
+        backend.set_options(matrix_product_state_max_bond_dimension=max_bond_dimension)
+    return backend
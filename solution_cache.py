@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+
+import networkx as nx
+
+from maxcut import CHALLENGES, exhaustive_maxcut
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "qite", "maxcut")
+
+def _canonical_edges(graph: nx.Graph):
+    return sorted([min(u, v), max(u, v)] for u, v in graph.edges)
+
+def graph_fingerprint(graph: nx.Graph) -> str:
+    """
+    Get the cache key of ``graph``: its Weisfeiler-Lehman hash, which is
+    invariant under relabelling, followed by a digest of its exact node count
+    and edge list, since the stored bitstrings depend on the node labels.
+    """
+    exact = hashlib.sha256(json.dumps([graph.number_of_nodes(), _canonical_edges(graph)]).encode()).hexdigest()
+    return nx.weisfeiler_lehman_graph_hash(graph) + "-" + exact[:16]
+
+class SolutionCache:
+    """
+    An on-disk store of the optimal cut values and solution sets returned by
+    ``maxcut.exhaustive_maxcut``, one JSON file per graph. Once the files add
+    up to more than ``max_bytes``, the least recently used ones are evicted.
+    """
+    def __init__(self, path: str = DEFAULT_CACHE_DIR, max_bytes: int = 256 * 2**20):
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(path, exist_ok=True)
+
+    def solve(self, graph: nx.Graph, processes: int = None):
+        """
+        Get the exact MaxCut solutions of ``graph``, running the exhaustive
+        search on ``processes`` worker processes and storing its result only
+        on a cache miss.
+        """
+        solutions = self.get(graph)
+        if solutions is None:
+            solutions = exhaustive_maxcut(graph, processes=processes)
+            self.put(graph, solutions)
+        return solutions
+
+    def get(self, graph: nx.Graph):
+        """
+        Get the stored solutions of ``graph``, or ``None`` if there are none.
+        """
+        file = self._file(graph)
+        try:
+            with open(file) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry["num_nodes"] != graph.number_of_nodes() or entry["edges"] != _canonical_edges(graph):
+            return None
+        os.utime(file)
+        return {challenge: tuple(entry["solutions"][challenge]) for challenge in CHALLENGES}
+
+    def put(self, graph: nx.Graph, solutions: dict):
+        """
+        Store the ``solutions`` of ``graph`` and evict old entries if needed.
+        """
+        entry = {
+            "num_nodes": graph.number_of_nodes(),
+            "edges": _canonical_edges(graph),
+            "solutions": {challenge: list(solutions[challenge]) for challenge in CHALLENGES},
+        }
+        file = self._file(graph)
+        with open(file + ".tmp", "w") as f:
+            json.dump(entry, f)
+        os.replace(file + ".tmp", file)
+        self.evict()
+
+    def evict(self):
+        """
+        Delete the least recently used entries until the cache fits in
+        ``self.max_bytes``.
+        """
+        files = [os.path.join(self.path, name) for name in os.listdir(self.path) if name.endswith(".json")]
+        files.sort(key=os.path.getmtime)
+        total = sum(os.path.getsize(file) for file in files)
+        while files and total > self.max_bytes:
+            file = files.pop(0)
+            total -= os.path.getsize(file)
+            os.remove(file)
+
+    def _file(self, graph: nx.Graph):
+        return os.path.join(self.path, graph_fingerprint(graph) + ".json")
+
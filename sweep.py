@@ -0,0 +1,92 @@
+import itertools
+from typing import Sequence, Union
+
+import numpy as np
+from qiskit import QuantumCircuit
+from qiskit.quantum_info import SparsePauliOp
+
+from ising import IsingHamiltonian
+from varQITE import QITEvolver
+
+def sweep(
+        hamiltonian: Union[SparsePauliOp, IsingHamiltonian],
+        ansatz: QuantumCircuit,
+        lr: Sequence[float] = (0.1,),
+        num_steps: Sequence[int] = (40,),
+        num_shots: Sequence[int] = (10000,),
+        exact: bool = False,
+        prune_margin: float = 1.0,
+        grace_steps: int = 5
+    ):
+    """
+    Evolve ``ansatz`` under ``hamiltonian`` for every combination of the given
+    ``lr``, ``num_steps`` and ``num_shots`` values.
+
+    The ansatz is compiled and the Hamiltonian unrolled once, and every
+    configuration evolves a ``fresh_copy`` of that evolver. Configurations
+    that only differ in ``num_steps`` share a single run, read off at each
+    step count. Runs advance one step at a time in turn; once every active
+    run has taken a step past ``grace_steps``, a run whose energy is more
+    than ``prune_margin`` above the lowest energy of that step is stopped.
+
+    Returns one dictionary per configuration, lowest final energy first, with
+    the configuration, its energies and parameters, and the step at which it
+    was pruned (``None`` if it ran to completion).
+    """
+    prototype = QITEvolver(hamiltonian, ansatz, exact=exact)
+    max_steps = max(num_steps)
+
+    # One run per (lr, num_shots), stepped in turn
+    runs = dict()
+    for run_lr, run_shots in itertools.product(lr, num_shots):
+        qit_evolver = prototype.fresh_copy()
+        qit_evolver.num_shots = run_shots
+        runs[run_lr, run_shots] = (qit_evolver, qit_evolver.evolve_steps(max_steps, run_lr))
+
+    best_energies = np.full(max_steps, np.inf)
+    pruned_at = {key: None for key in runs}
+    active = list(runs)
+    while active:
+        # Advance every active run by one step before comparing any of them,
+        # so that pruning does not depend on the order of the grid
+        for key in list(active):
+            qit_evolver, steps = runs[key]
+            num_done = len(qit_evolver.energies)
+            while len(qit_evolver.energies) == num_done:
+                job = next(steps, None)
+                if job is None:
+                    break
+                job.result()
+            if len(qit_evolver.energies) == num_done:
+                steps.close()
+                active.remove(key)
+                continue
+            step = len(qit_evolver.energies) - 1
+            best_energies[step] = min(best_energies[step], qit_evolver.energies[step])
+
+        for key in list(active):
+            qit_evolver, steps = runs[key]
+            step = len(qit_evolver.energies) - 1
+            if step + 1 >= max_steps:
+                steps.close()
+                active.remove(key)
+            elif step >= grace_steps and qit_evolver.energies[step] > best_energies[step] + prune_margin:
+                steps.close()
+                active.remove(key)
+                pruned_at[key] = step
+
+    results = list()
+    for (run_lr, run_shots), steps in itertools.product(runs, num_steps):
+        qit_evolver = runs[run_lr, run_shots][0]
+        completed = len(qit_evolver.energies) >= steps
+        results.append({
+            "lr": run_lr,
+            "num_steps": steps,
+            "num_shots": run_shots,
+            "final_energy": qit_evolver.energies[min(steps, len(qit_evolver.energies)) - 1],
+            "energies": qit_evolver.energies[:steps],
+            "params": qit_evolver.param_vals[min(steps, len(qit_evolver.energies)) - 1],
+            "pruned_at": None if completed else pruned_at[run_lr, run_shots],
+        })
+    results.sort(key=lambda r: (r["pruned_at"] is not None, r["final_energy"]))
+    return results
@@ -0,0 +1,22 @@
+import networkx as nx
+import pytest
+
+from ansatz1 import edge_coloring
+
+@pytest.mark.parametrize("graph", [
+    nx.complete_graph(7),
+    nx.petersen_graph(),
+    nx.star_graph(9),
+    nx.cycle_graph(9),
+    nx.gnp_random_graph(40, 0.2, seed=5),
+    nx.barabasi_albert_graph(60, 3, seed=2),
+])
+def test_edge_coloring_is_proper_with_at_most_max_degree_plus_one_colors(graph):
+    coloring = edge_coloring(graph)
+    max_degree = max(d for _, d in graph.degree)
+
+    assert set(coloring) == set(graph.edges)
+    assert all(0 <= c <= max_degree for c in coloring.values())
+    for node in graph:
+        colors = [coloring[e] if e in coloring else coloring[e[::-1]] for e in graph.edges(node)]
+        assert len(colors) == len(set(colors))
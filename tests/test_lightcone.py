@@ -0,0 +1,24 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+import ansatz1
+from build_graph import build_ansatz
+from ising import IsingHamiltonian
+from varQITE import QITEvolver
+
+@pytest.mark.parametrize("graph", [
+    nx.path_graph(7),
+    nx.cycle_graph(8),
+    nx.random_regular_graph(3, 8, seed=1),
+])
+@pytest.mark.parametrize("build", [build_ansatz, ansatz1.build_ansatz])
+def test_lightcone_matches_exact_evolution(graph, build):
+    ansatz, hamiltonian = build(graph), IsingHamiltonian.from_graph(graph)
+    exact = QITEvolver(hamiltonian, ansatz, exact=True)
+    lightcone = QITEvolver(hamiltonian, ansatz, lightcone=True)
+    exact.evolve(num_steps=3, lr=0.1, verbose=False)
+    lightcone.evolve(num_steps=3, lr=0.1, verbose=False)
+
+    np.testing.assert_allclose(lightcone.energies, exact.energies, atol=1e-9)
+    np.testing.assert_allclose(lightcone.param_vals, exact.param_vals, atol=1e-9)
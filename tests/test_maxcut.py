@@ -0,0 +1,42 @@
+import itertools
+
+import networkx as nx
+import pytest
+
+from maxcut import exhaustive_maxcut
+
+def brute_force_maxcut(graph):
+    n = graph.number_of_nodes()
+    best = {"base": (None, []), "balanced": (None, []), "connected": (None, [])}
+
+    def update(challenge, cut, bitstring):
+        best_cut, solutions = best[challenge]
+        if best_cut is None or cut > best_cut:
+            best[challenge] = (cut, [bitstring])
+        elif cut == best_cut:
+            solutions.append(bitstring)
+
+    for bits in itertools.product("01", repeat=n):
+        sides = [[u for u in graph if bits[u] == side] for side in "01"]
+        if not all(sides):
+            continue
+        bitstring = "".join(bits)
+        cut = sum(1 for u, v in graph.edges if bits[u] != bits[v])
+        update("base", cut, bitstring)
+        if len(sides[1]) in (n // 2, (n + 1) // 2):
+            update("balanced", cut, bitstring)
+        if all(nx.is_connected(graph.subgraph(side)) for side in sides):
+            update("connected", cut, bitstring)
+    return {challenge: (cut, sorted(solutions)) for challenge, (cut, solutions) in best.items()}
+
+@pytest.mark.parametrize("graph", [
+    nx.cycle_graph(7),
+    nx.petersen_graph(),
+    nx.star_graph(6),
+    nx.gnp_random_graph(11, 0.35, seed=3),
+    nx.random_regular_graph(3, 10, seed=1),
+])
+@pytest.mark.parametrize("low_bits", [3, 20])
+def test_exhaustive_maxcut_matches_brute_force(graph, low_bits):
+    solutions = exhaustive_maxcut(graph, low_bits=low_bits, processes=1)
+    assert {challenge: (cut, sorted(XS)) for challenge, (cut, XS) in solutions.items()} == brute_force_maxcut(graph)
@@ -0,0 +1,15 @@
+from build_graph import build_ansatz, build_maxcut_hamiltonian
+from generate_graph import make_graph
+from sweep import sweep
+
+def test_pruning_does_not_depend_on_grid_order():
+    graph = make_graph("regular_graph_4_8")
+    hamiltonian, ansatz = build_maxcut_hamiltonian(graph), build_ansatz(graph)
+
+    outcomes = list()
+    for lr in [(0.05, 0.1, 0.4), (0.4, 0.1, 0.05)]:
+        results = sweep(hamiltonian, ansatz, lr=lr, num_steps=(6,), exact=True, grace_steps=1, prune_margin=0.3)
+        outcomes.append({r["lr"]: (r["pruned_at"], r["final_energy"]) for r in results})
+
+    assert outcomes[0] == outcomes[1]
+    assert any(pruned_at is not None for pruned_at, _ in outcomes[0].values())
@@ -1,44 +1,93 @@
 import numpy as np
-from qiskit.quantum_info import SparsePauliOp
+from typing import List
 
-def compute_cut_size(graph, bitstring):
+# Records layout of measured or exact output distributions: packed states, see
+# ``pack_states``, and the shots (or probability) of each
+SAMPLES_DTYPE = np.dtype([("states", np.uint64), ("counts", float)])
+
+# Every byte with its bits reversed
+_REVERSED_BYTES = np.array([int(format(b, "08b")[::-1], 2) for b in range(256)], dtype=np.uint8)
+
+def reverse_bits(values: np.array, num_bits: int):
+    """
+    Reverse the lowest ``num_bits`` bits (at most 64) of each of the unsigned
+    integers ``values``. This turns Aer's integer outcomes, whose bit ``q`` is
+    qubit ``q``, into packed states whose bit ``i`` is character ``i`` of a
+    counts key, i.e. qubit ``num_bits - 1 - i``, and back.
+    """
+    values = np.ascontiguousarray(values, dtype=np.uint64)
+    reversed_bytes = _REVERSED_BYTES[values.view(np.uint8).reshape(-1, 8)[:, ::-1]]
+    return np.ascontiguousarray(reversed_bytes).view(np.uint64).reshape(values.shape) >> np.uint64(64 - num_bits)
+
+def counts_to_samples(counts: dict, num_qubits: int = None):
+    """
+    Load a counts dictionary into a ``SAMPLES_DTYPE`` records array. Keys are
+    either Aer's raw hexadecimal outcomes, as in ``result.data(i)["counts"]``,
+    which need ``num_qubits``, or bitstrings as returned by ``get_counts``.
+    The order of ``counts`` is kept.
+    """
+    keys = list(counts)
+    samples = np.zeros(len(keys), SAMPLES_DTYPE)
+    samples["counts"] = np.fromiter(counts.values(), float, len(keys))
+    if not keys:
+        return samples
+    num_qubits = num_qubits or len(keys[0])
+    if num_qubits > 64:
+        raise ValueError("States of {} qubits do not fit in 64 bits".format(num_qubits))
+    if keys[0].startswith("0x"):
+        samples["states"] = reverse_bits(np.array([int(key, 16) for key in keys], dtype=np.uint64), num_qubits)
+    else:
+        samples["states"] = pack_bitstrings(keys)
+    return samples
+
+def probabilities_to_records(probabilities: np.array, num_qubits: int):
     """
-    Get the cut size of the partition of ``graph`` described by the given
-    ``bitstring``.
+    Turn the exact output distribution of a ``num_qubits`` circuit, indexed like
+    Aer's ``save_probabilities`` output, into a ``SAMPLES_DTYPE`` records array
+    like the ones ``counts_to_samples`` makes of sampled measurements.
     """
-    cut_sz = 0
-    for (u, v) in graph.edges:
-        if bitstring[u] != bitstring[v]:
-            cut_sz += 1
-    return cut_sz
+    records = np.empty(2**num_qubits, SAMPLES_DTYPE)
+    records["states"] = reverse_bits(np.arange(2**num_qubits, dtype=np.uint64), num_qubits)
+    records["counts"] = probabilities
+    return records
 
-def get_ising_energies(
-        operator: SparsePauliOp, 
-        states: np.array
-    ):
+def result_to_samples(result, index: int, num_qubits: int):
     """
-    Get the energies of the given Ising ``operator`` that correspond to the
-    given ``states``.
+    Load the measured counts or, failing that, the exact probabilities of
+    experiment ``index`` of the Aer ``result`` of a ``num_qubits`` circuit
+    into a ``SAMPLES_DTYPE`` records array, without formatting any bitstring.
     """
-    # Unroll Hamiltonian data into NumPy arrays
-    paulis = np.array([list(ops) for ops, _ in operator.label_iter()]) != "I"
-    coeffs = operator.coeffs.real
-    
-    # Vectorized energies computation
-    energies = (-1) ** (states @ paulis.T) @ coeffs
-    return energies
+    data = result.data(index)
+    if "counts" in data:
+        return counts_to_samples(data["counts"], num_qubits)
+    return probabilities_to_records(data["probabilities"], num_qubits)
 
-def expected_energy(
-        hamiltonian: SparsePauliOp,
-        measurements: np.array
-):
+def unpack_states(states: np.array, num_qubits: int):
     """
-    Compute the expected energy of the given ``hamiltonian`` with respect to
-    the observed ``measurement``.
+    Unpack the given packed ``states`` into a 0/1 matrix whose column ``i`` is
+    bit ``i``, the inverse of ``pack_states``.
+    """
+    shifts = np.arange(num_qubits, dtype=np.uint64)
+    return ((np.asarray(states, dtype=np.uint64)[:, None] >> shifts) & np.uint64(1)).astype(np.uint8)
+
+def format_states(states: np.array, num_qubits: int) -> List[str]:
+    """
+    Format packed ``states`` back into Qiskit counts keys.
+    """
+    return ["".join(chars) for chars in np.where(unpack_states(states, num_qubits), "1", "0")]
 
-    The latter is assumed to by a NumPy records array with fields ``states``
-    --describing the observed bit-strings as an integer array-- and ``counts``,
-    describing the corresponding observed frequency of each state.
+def pack_states(states: np.array):
+    """
+    Pack each row of the given 0/1 ``states`` matrix (at most 64 columns) into
+    a single unsigned integer whose bit ``i`` is column ``i``.
+    """
+    states = np.asarray(states, dtype=np.uint64)
+    return states @ (np.uint64(1) << np.arange(states.shape[-1], dtype=np.uint64))
+
+def pack_bitstrings(bitstrings: List[str]):
+    """
+    Pack Qiskit counts keys into unsigned integers whose bit ``i`` is
+    character ``i`` of the key, as ``pack_states`` does for states arrays.
     """
-    energies = get_ising_energies(hamiltonian, measurements["states"])
-    return np.dot(energies, measurements["counts"]) / measurements["counts"].sum()
\ No newline at end of file
+    chars = np.frombuffer("".join(bitstrings).encode(), dtype=np.uint8).reshape(len(bitstrings), -1)
+    return pack_states(chars - ord("0"))
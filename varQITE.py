@@ -1,109 +1,616 @@
-import matplotlib.pyplot as plt
-from IPython import display
-
+import copy
+import hashlib
+import io
+import json
 import numpy as np
-import pandas as pd
+import os
 import time
 
-from typing import List
+from typing import Callable, List, Union
 from qiskit import QuantumCircuit, transpile
 from qiskit.quantum_info import SparsePauliOp
-from qiskit_aer import AerSimulator
 
-from utils import get_ising_energies, expected_energy
+from ising import IsingHamiltonian
+from lightcone import LightconeEstimator
+from simulators import select_backend
+from utils import counts_to_samples, result_to_samples
+
+# Phases of a QITE step timed by ``QITEvolver.evolve``, in order
+PHASES = ("build", "submit", "simulate", "decode", "ode", "solve")
+
+# Number of (state, term) entries of the parity matrix built at once when
+# reading exact distributions
+EXACT_CHUNK_ENTRIES = 2**21
+
+class PhaseTimer:
+    """
+    Record the wall-clock time elapsed between consecutive calls to ``lap``.
+    """
+    def __init__(self):
+        self.timings = dict()
+        self._last = time.perf_counter()
+
+    def lap(self, phase: str):
+        now = time.perf_counter()
+        self.timings[phase] = now - self._last
+        self._last = now
+
+class AdaptiveShots:
+    """
+    Shot allocation for the circuits of a QITE step, set as
+    ``QITEvolver.shot_allocator`` in sampling mode.
+
+    The ``total_shots`` of a step are split between its circuits in
+    proportion to the standard deviation of the Pauli terms measured on each
+    circuit at the previous step, the rows of ``Gmat`` and ``dvec`` they feed
+    (Neyman allocation). Shot counts are rounded to powers of two, one Aer
+    job per distinct count, and are at least ``min_shots`` rounded up to a
+    power of two. After every step the total is multiplied by ``growth`` if
+    the energy improved by less than ``noise_ratio`` standard errors, and
+    divided by it if it improved by more than four times that, staying
+    between ``min_shots`` per circuit and ``max_total_shots``.
+    """
+    def __init__(
+            self,
+            total_shots: int,
+            min_shots: int = 64,
+            max_total_shots: int = None,
+            growth: float = 2.0,
+            noise_ratio: float = 1.0
+        ):
+        self.total_shots = total_shots
+        self.min_shots = min_shots
+        self.max_total_shots = max_total_shots
+        self.growth = growth
+        self.noise_ratio = noise_ratio
+        self._stds = None
+
+    def allocate(self, num_circuits: int):
+        """
+        Get the number of shots of each of the ``num_circuits`` circuits of the
+        next step.
+        """
+        if self._stds is None or len(self._stds) != num_circuits or not self._stds.sum():
+            shares = np.full(num_circuits, 1 / num_circuits)
+        else:
+            shares = self._stds / self._stds.sum()
+        shots = 2 ** np.round(np.log2(np.maximum(self.total_shots * shares, 1)))
+        return np.maximum(shots, 2 ** np.ceil(np.log2(self.min_shots))).astype(int)
+
+    def update(self, term_stds: np.array, coeffs: np.array, shots: np.array, energies: List[float]):
+        """
+        Record the (number of circuits, number of terms) single-shot standard
+        deviations ``term_stds`` measured at the last step with ``shots`` shots
+        per circuit, and adapt the total budget to the energy improvement of
+        that step, the energy being ``coeffs`` times the terms.
+        """
+        self._stds = np.linalg.norm(term_stds, axis=1)
+        if len(energies) < 2:
+            return
+        standard_error = np.linalg.norm(coeffs * term_stds[0]) / np.sqrt(shots[0])
+        improvement = energies[-2] - energies[-1]
+        if improvement < self.noise_ratio * standard_error:
+            self.total_shots *= self.growth
+        elif improvement > 4 * self.noise_ratio * standard_error:
+            self.total_shots /= self.growth
+        self.total_shots = max(self.total_shots, self.min_shots * len(self._stds))
+        if self.max_total_shots is not None:
+            self.total_shots = min(self.total_shots, self.max_total_shots)
+
+class LazyJacobian:
+    """
+    Reuse of the dynamics matrix across QITE steps, set as
+    ``QITEvolver.jacobian`` to skip the parameter-shift circuits on most
+    steps.
+
+    After a step that measured ``Gmat`` in full, the following steps only run
+    the energy circuit, whose term expectations ``m`` are compared with the
+    previous step's to update ``Gmat`` (twice the Jacobian of ``m``) with
+    Broyden's rank-one secant update. The next step measures ``Gmat`` again
+    once the secant residual ``|2Δm - Gmat Δθ| / |2Δm|`` of an update
+    exceeds ``residual_tol``, the parameters have drifted further than
+    ``max_drift`` from the last full measurement, or ``max_age`` steps have
+    gone by.
+    """
+    def __init__(self, residual_tol: float = 1.0, max_drift: float = 1.0, max_age: int = 20):
+        self.residual_tol = residual_tol
+        self.max_drift = max_drift
+        self.max_age = max_age
+        self.Gmat = None
+        self.refresh = True
+        self.num_refreshes = 0
+
+    def needs_refresh(self, params: np.array) -> bool:
+        """
+        Tell whether ``Gmat`` must be measured in full at ``params``.
+        """
+        return (
+            self.Gmat is None or self.refresh or self.age >= self.max_age
+            or np.linalg.norm(params - self.reference_params) > self.max_drift
+        )
+
+    def measured(self, Gmat: np.array, params: np.array, term_means: np.array):
+        """
+        Record a full measurement of ``Gmat`` with the term expectations
+        ``term_means`` at ``params``.
+        """
+        self.Gmat = Gmat
+        self.reference_params = self.last_params = params.copy()
+        self.last_term_means = term_means
+        self.age, self.refresh = 0, False
+        self.num_refreshes += 1
+
+    def update(self, params: np.array, term_means: np.array) -> np.array:
+        """
+        Update ``Gmat`` from the term expectations ``term_means`` measured at
+        ``params`` and return it.
+        """
+        step = params - self.last_params
+        change = 2 * (term_means - self.last_term_means)
+        if step @ step > 0:
+            residual = change - self.Gmat @ step
+            self.Gmat = self.Gmat + np.outer(residual, step) / (step @ step)
+            if np.linalg.norm(residual) > self.residual_tol * max(np.linalg.norm(change), 1e-12):
+                self.refresh = True
+        self.last_params, self.last_term_means = params.copy(), term_means
+        self.age += 1
+        return self.Gmat
+
+class SPSAJacobian:
+    """
+    Simultaneous-perturbation estimate of the dynamics matrix, set as
+    ``QITEvolver.spsa`` to run ``2 * num_samples + 1`` circuits per step
+    whatever the number of parameters.
+
+    Instead of shifting each parameter in turn, every step shifts all of
+    them at once by ``±perturbation * Δ`` for ``num_samples`` random sign
+    vectors ``Δ``. Each pair of circuits estimates ``Gmat Δ`` (twice the
+    directional derivative of the term expectations), and since ``E[ΔΔᵀ] = I``
+    the products of those estimates with ``Δᵀ`` average to ``Gmat``. More
+    samples lower the variance at a linear cost in circuits; ``smoothing``
+    below 1 also averages the estimate with the previous step's, trading
+    variance for lag.
+    """
+    def __init__(self, num_samples: int = 4, perturbation: float = 0.2, smoothing: float = 1.0, seed: int = None):
+        self.num_samples = num_samples
+        self.perturbation = perturbation
+        self.smoothing = smoothing
+        self.rng = np.random.default_rng(seed)
+        self.Gmat = None
+
+    def get_iteration_params(self, curr_params: np.array):
+        """
+        Get the parameter values of the circuits of a step, as
+        ``QITEvolver.get_iteration_params`` does: the current parameters
+        first, then each random perturbation added and subtracted in turn.
+        """
+        self.deltas = self.rng.choice([-1.0, 1.0], size=(self.num_samples, len(curr_params)))
+        shifts = np.kron(self.deltas, [[1], [-1]]) * self.perturbation
+        return np.vstack([curr_params, curr_params + shifts])
+
+    def estimate(self, differences: np.array):
+        """
+        Turn the (number of terms, ``num_samples``) differences between the
+        term expectations of each pair of perturbed circuits into an
+        estimate of ``Gmat``.
+        """
+        Gmat = differences @ self.deltas / (self.perturbation * self.num_samples)
+        if self.Gmat is not None and self.Gmat.shape == Gmat.shape:
+            Gmat = (1 - self.smoothing) * self.Gmat + self.smoothing * Gmat
+        self.Gmat = Gmat
+        return Gmat
 
 class QITEvolver:
     """
     A class to evolve a parametrized quantum state under the action of an Ising
     Hamiltonian according to the variational Quantum Imaginary Time Evolution
     (QITE) principle described in IonQ's latest joint paper with ORNL.
+
+    With ``exact=True`` the expectation values entering the QITE iteration are
+    read off the exact output distribution of each circuit (computed from its
+    statevector) instead of being estimated from ``num_shots`` samples.
+    Otherwise, setting ``shot_allocator`` to an ``AdaptiveShots`` instance
+    replaces the fixed ``num_shots`` per circuit by a variance-based budget.
+    In either mode, setting ``jacobian`` to a ``LazyJacobian`` instance only
+    measures the parameter-shift circuits when the dynamics matrix needs a
+    refresh, and runs the energy circuit alone on the other steps, and
+    setting ``spsa`` to an ``SPSAJacobian`` instance estimates it from a
+    fixed number of random simultaneous perturbations instead.
+    With ``lightcone=True`` the exact values are computed without running any
+    circuit, each term being simulated on its lightcone only (see
+    ``lightcone.LightconeEstimator``), which also works beyond the qubit count
+    of the simulator when the ansatz keeps every lightcone small.
+
+    Unless a ``backend`` is given, the Aer method (statevector, matrix
+    product state, ...) is picked from the structure of the ansatz by
+    ``simulators.select_backend`` under its default memory and time caps.
+    Lightcone runs need no backend and leave it ``None``.
+
+    The Hamiltonian may be given as a ``SparsePauliOp`` or directly as an
+    ``IsingHamiltonian``; energies are always evaluated on the latter, and the
+    ``SparsePauliOp`` form is only built if ``hamiltonian`` is read.
     """
-    def __init__(self, hamiltonian: SparsePauliOp, ansatz: QuantumCircuit):
-        self.hamiltonian = hamiltonian
+    def __init__(
+            self,
+            hamiltonian: Union[SparsePauliOp, IsingHamiltonian],
+            ansatz: QuantumCircuit,
+            exact: bool = False,
+            lightcone: bool = False,
+            backend = None
+        ):
+        if isinstance(hamiltonian, IsingHamiltonian):
+            self.ising, self._hamiltonian = hamiltonian, None
+        else:
+            self.ising, self._hamiltonian = IsingHamiltonian.from_sparse_pauli_op(hamiltonian), hamiltonian
         self.ansatz = ansatz
+        self.exact = exact or lightcone
 
         # Define some constants
-        self.backend = AerSimulator()
         self.num_shots = 10000
+        if backend is None and not lightcone:
+            backend = select_backend(ansatz, shots=1 if self.exact else self.num_shots, exact=self.exact)
+        self.backend = backend
+        self.shot_allocator = None
+        self.jacobian = None
+        self.spsa = None
         self.energies, self.param_vals, self.runtime = list(), list(), list()
+        self.timings, self.shots = list(), list()
+        if lightcone:
+            self.lightcone, self.iteration_circuit = LightconeEstimator(ansatz, self.ising), None
+        else:
+            self.lightcone = None
+            self.compile_ansatz()
+
+    def compile_ansatz(self):
+        """
+        Add measurement gates (or save the exact distribution) to
+        ``self.ansatz`` and transpile it for ``self.backend``, once. Every QITE
+        step then only binds parameter values to this circuit. Call again after
+        replacing ``self.backend``.
+        """
+        circuit = self.ansatz.copy()
+        if self.exact:
+            circuit.save_probabilities()
+        else:
+            circuit.measure_all()
+        self.iteration_circuit = transpile(circuit, self.backend)
+
+    @property
+    def hamiltonian(self) -> SparsePauliOp:
+        """
+        The Hamiltonian as a ``SparsePauliOp``, converted from ``self.ising``
+        on first use when only that form was given.
+        """
+        if self._hamiltonian is None:
+            self._hamiltonian = self.ising.to_sparse_pauli_op()
+        return self._hamiltonian
 
-    def evolve(self, num_steps: int, lr: float = 0.4, verbose: bool = True):
+    def fresh_copy(self):
+        """
+        Get a new evolver for the same problem, with an empty run history but
+        sharing this one's Hamiltonian data, backend and compiled circuit.
+        """
+        clone = copy.copy(self)
+        clone.energies, clone.param_vals, clone.runtime = list(), list(), list()
+        clone.timings, clone.shots = list(), list()
+        for name in ("shot_allocator", "jacobian", "spsa"):
+            if getattr(self, name) is not None:
+                setattr(clone, name, copy.deepcopy(getattr(self, name)))
+        return clone
+
+    def evolve(
+            self,
+            num_steps: int,
+            lr: float = 0.4,
+            verbose: bool = True,
+            callback: Callable[[dict], None] = None,
+            initial_params: np.array = None
+        ):
         """
         Evolve the variational quantum state encoded by ``self.ansatz`` under
         the action of ``self.hamiltonian`` according to varQITE.
+
+        The time spent in each of the ``PHASES`` of every step is kept in
+        ``self.timings``. After every step, ``callback`` (if given) is called
+        with a dictionary holding the step index, energy, parameters, number of
+        circuits, total number of shots and phase timings, e.g. a
+        ``JSONLLogger`` or a ``Checkpointer`` in headless runs.
+
+        The evolution starts from ``initial_params`` if given, otherwise it
+        continues from the last parameters in ``self.param_vals`` (e.g. after
+        ``load_checkpoint``), or from all zeros on a fresh evolver.
         """
-        curr_params = np.zeros(self.ansatz.num_parameters)
+        for job in self.evolve_steps(num_steps, lr, verbose, callback, initial_params):
+            job.result()
+
+    def evolve_steps(
+            self,
+            num_steps: int,
+            lr: float = 0.4,
+            verbose: bool = False,
+            callback: Callable[[dict], None] = None,
+            initial_params: np.array = None
+        ):
+        """
+        Generator behind ``evolve``: yields the Aer jobs of every step as soon
+        as they are all submitted and only processes their results when
+        resumed, so the caller decides how to wait for the simulation (see
+        ``scheduler``). There is one job per step unless ``shot_allocator``
+        splits the circuits between several shot counts.
+        """
+        if initial_params is not None:
+            curr_params = np.array(initial_params, dtype=float)
+            if curr_params.shape != (self.ansatz.num_parameters,):
+                raise ValueError("Expected {} initial parameters, got {}".format(self.ansatz.num_parameters, curr_params.shape))
+        elif self.param_vals:
+            curr_params = self.param_vals[-1].copy()
+        else:
+            curr_params = np.zeros(self.ansatz.num_parameters)
         for k in range(num_steps):
-            # Get circuits and measure on backend
-            iter_qc = self.get_iteration_circuits(curr_params)
-            job = self.backend.run(iter_qc, shots=self.num_shots)
-            q0 = time.time()
-            measurements = job.result().get_counts()
-            quantum_exec_time = time.time() - q0
-
-            # Update parameters-- set up defining ODE and step forward
-            Gmat, dvec, curr_energy = self.get_defining_ode(measurements)
+            timer = PhaseTimer()
+
+            # Bind the iteration's parameter values to the compiled ansatz and
+            # measure on backend, one job per distinct number of shots
+            refresh = self.jacobian is None or self.jacobian.needs_refresh(curr_params)
+            if not refresh:
+                iter_params = curr_params[None]
+            elif self.spsa is not None:
+                iter_params = self.spsa.get_iteration_params(curr_params)
+            else:
+                iter_params = self.get_iteration_params(curr_params)
+            if self.lightcone is not None:
+                # Evaluate every term on its own lightcone instead of running the circuits
+                shots, measurements = np.zeros(len(iter_params), dtype=int), iter_params
+                for phase in ("build", "submit"):
+                    timer.lap(phase)
+                Gmat, dvec, curr_energy = self.lightcone.defining_ode(iter_params)
+                for phase in ("simulate", "decode"):
+                    timer.lap(phase)
+            else:
+                shots = self.get_iteration_shots(len(iter_params))
+                groups = [np.flatnonzero(shots == num_shots) for num_shots in np.unique(shots)]
+                timer.lap("build")
+                jobs = [
+                    self.backend.run(
+                        self.iteration_circuit,
+                        parameter_binds=[dict(zip(self.ansatz.parameters, iter_params[rows].T))],
+                        shots=1 if self.exact else int(shots[rows[0]]),
+                    )
+                    for rows in groups
+                ]
+                timer.lap("submit")
+                for job in jobs:
+                    yield job
+                results = [job.result() for job in jobs]
+                timer.lap("simulate")
+                measurements = [None] * len(iter_params)
+                for rows, result in zip(groups, results):
+                    for i, row in enumerate(rows):
+                        measurements[row] = result_to_samples(result, i, self.ansatz.num_qubits)
+                timer.lap("decode")
+
+                # Update parameters-- set up defining ODE and step forward
+                Gmat, dvec, curr_energy = self.get_defining_ode(measurements)
+            if self.spsa is not None and refresh:
+                Gmat = self.spsa.estimate(Gmat)
+
+            # Keep the dynamics matrix up to date from the energy circuit alone
+            if self.jacobian is not None:
+                if self.lightcone is not None:
+                    term_means = self.lightcone.term_means(curr_params)
+                else:
+                    term_means = self.get_term_means(measurements[:1])[0]
+                if refresh:
+                    self.jacobian.measured(Gmat, curr_params, term_means)
+                else:
+                    Gmat = self.jacobian.update(curr_params, term_means)
+            timer.lap("ode")
             dcurr_params = np.linalg.lstsq(Gmat, dvec, rcond=1e-2)[0]
             curr_params += lr * dcurr_params
+            timer.lap("solve")
 
             # Progress checkpoint!
             if verbose:
                 self.print_status(measurements)
             self.energies.append(curr_energy)
             self.param_vals.append(curr_params.copy())
-            self.runtime.append(quantum_exec_time)
+            self.runtime.append(timer.timings["simulate"] + timer.timings["decode"])
+            self.timings.append(timer.timings)
+            self.shots.append(0 if self.exact else int(shots.sum()))
+            if self.shot_allocator is not None and not self.exact and self.lightcone is None:
+                self.shot_allocator.update(self.get_term_stds(measurements), self.ising.coeffs, shots, self.energies)
+            if callback is not None:
+                callback({
+                    "step": len(self.energies) - 1,
+                    "energy": curr_energy,
+                    "params": curr_params.copy(),
+                    "num_circuits": len(measurements),
+                    "num_shots": self.shots[-1],
+                    "timings": timer.timings,
+                })
+
+    def save_checkpoint(self, path: str):
+        """
+        Save the run history to the npz file ``path``, along with metadata
+        identifying the ansatz and Hamiltonian it belongs to. The file is
+        written atomically, so an interrupted save leaves the previous
+        checkpoint intact.
+        """
+        num_steps = len(self.param_vals)
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            energies=np.array(self.energies, dtype=float),
+            param_vals=np.array(self.param_vals, dtype=float).reshape(num_steps, self.ansatz.num_parameters),
+            runtime=np.array(self.runtime, dtype=float),
+            shots=np.array(self.shots, dtype=np.int64),
+            timings=json.dumps(self.timings),
+            metadata=json.dumps(self.get_metadata()),
+        )
+        with open(path + ".tmp", "wb") as f:
+            f.write(buffer.getvalue())
+        os.replace(path + ".tmp", path)
+
+    def load_checkpoint(self, path: str):
+        """
+        Restore the run history saved by ``save_checkpoint`` at ``path``, so
+        that the next call to ``evolve`` resumes from its last parameters.
+        Raises ``ValueError`` if the checkpoint belongs to another problem.
+        """
+        with np.load(path) as checkpoint:
+            metadata = json.loads(str(checkpoint["metadata"]))
+            if metadata != self.get_metadata():
+                raise ValueError("Checkpoint {} does not match this ansatz and Hamiltonian".format(path))
+            self.energies = checkpoint["energies"].tolist()
+            self.param_vals = list(checkpoint["param_vals"])
+            self.runtime = checkpoint["runtime"].tolist()
+            self.shots = checkpoint["shots"].tolist()
+            self.timings = json.loads(str(checkpoint["timings"]))
+
+    def get_metadata(self):
+        """
+        Get the description of the problem stored with checkpoints: the shape
+        of the ansatz and a digest of the Ising Hamiltonian.
+        """
+        digest = hashlib.sha256()
+        digest.update(json.dumps([int(mask) for mask in self.ising.z_masks]).encode())
+        for array in (self.ising.coeffs, np.array([self.ising.offset])):
+            digest.update(array.tobytes())
+        return {
+            "num_qubits": self.ansatz.num_qubits,
+            "num_parameters": self.ansatz.num_parameters,
+            "ops": {name: int(count) for name, count in sorted(self.ansatz.count_ops().items())},
+            "hamiltonian": digest.hexdigest(),
+            "exact": self.exact,
+        }
 
     def get_defining_ode(self, measurements: List[dict[str, int]]):
         """
         Construct the dynamics matrix and load vector defining the varQITE
         iteration.
+
+        Each entry of ``measurements`` is either a records array of packed
+        states, as made by ``utils.result_to_samples``, or a counts dictionary.
         """
-        # Load sampled bitstrings and corresponding frequencies into NumPy arrays
-        dtype = np.dtype([("states", int, (self.ansatz.num_qubits,)), ("counts", "f")])
-        measurements = [np.fromiter(map(lambda kv: (list(kv[0]), kv[1]), res.items()), dtype) for res in measurements]
+        if self._shared_states(measurements) is not None:
+            term_means, energy_moments = self._exact_moments(measurements)
+            curr_energy = self.ising.offset + term_means[0] @ self.ising.coeffs
+            dvec = curr_energy * term_means[0] - energy_moments
+        else:
+            weights, bounds, parities = self._decode(measurements)
+            term_means = 1 - 2 * np.stack([weights[lo:hi] @ parities[lo:hi] for lo, hi in zip(bounds[:-1], bounds[1:])])
+
+            # Set up the load vector
+            num_states = bounds[1]
+            curr_energy = self.ising.offset + term_means[0] @ self.ising.coeffs
+            signs = 1 - 2 * parities[:num_states].astype(int)
+            state_energies = self.ising.offset + signs @ self.ising.coeffs
+            dvec = -(weights[:num_states] * (state_energies - curr_energy)) @ signs
 
         # Set up the dynamics matrix by computing the gradient of each Pauli word
         # with respect to each parameter in the ansatz using the parameter-shift rule
-        pauli_terms = [SparsePauliOp(op) for op, _ in self.hamiltonian.label_iter() if set(op) != set("I")]
-        Gmat = np.zeros((len(pauli_terms), self.ansatz.num_parameters))
-        for i, pauli_word in enumerate(pauli_terms):
-            for j, jth_pair in enumerate(zip(measurements[1::2], measurements[2::2])):
-                for pm, pm_shift in enumerate(jth_pair):
-                    Gmat[i, j] += (-1)**pm * expected_energy(pauli_word, pm_shift)
-        
-        # Set up the load vector
-        curr_energy = expected_energy(self.hamiltonian, measurements[0])
-        dvec = np.zeros(len(pauli_terms))
-        for i, pauli_word in enumerate(pauli_terms):
-            rhs_op_energies = get_ising_energies(pauli_word, measurements[0]["states"])
-            rhs_op_energies *= get_ising_energies(self.hamiltonian, measurements[0]["states"]) - curr_energy
-            dvec[i] = -np.dot(rhs_op_energies, measurements[0]["counts"]) / self.num_shots
+        Gmat = (term_means[1::2] - term_means[2::2]).T
         return Gmat, dvec, curr_energy
 
+    def get_term_means(self, measurements: List[dict[str, int]]):
+        """
+        Get the expectation value of every term of ``self.ising`` on each of
+        the circuits behind ``measurements``, one row per circuit.
+        """
+        if self._shared_states(measurements) is not None:
+            return self._exact_moments(measurements)[0]
+        weights, bounds, parities = self._decode(measurements)
+        return 1 - 2 * np.stack([weights[lo:hi] @ parities[lo:hi] for lo, hi in zip(bounds[:-1], bounds[1:])])
+
+    def _shared_states(self, measurements: List[dict[str, int]]):
+        # The states of exact distributions, if every circuit has one over the
+        # same 2**n states in the same order, else None
+        num_states = 2**self.ansatz.num_qubits
+        if not self.exact or not all(isinstance(res, np.ndarray) and len(res) == num_states for res in measurements):
+            return None
+        states = measurements[0]["states"]
+        if not all(np.array_equal(res["states"], states) for res in measurements[1:]):
+            return None
+        return states
+
+    def _exact_moments(self, measurements: List[np.ndarray]):
+        # Term expectations of every circuit and sum_s p_0(s) E(s) sign_t(s)
+        # for the first one, from the (circuits, 2**n) probability matrix.
+        # Parities are computed once per chunk of states rather than once
+        # per circuit, keeping the memory down to a few chunk-sized arrays.
+        # State energies are read off the cached diagonal, which is no larger
+        # than a single distribution
+        states = measurements[0]["states"]
+        self.ising.diagonal()
+        probabilities = np.stack([res["counts"] for res in measurements])
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        term_means = np.zeros((len(measurements), len(self.ising.coeffs)))
+        energy_moments = np.zeros(len(self.ising.coeffs))
+        chunk = max(1, EXACT_CHUNK_ENTRIES // max(1, len(self.ising.coeffs)))
+        for lo in range(0, len(states), chunk):
+            signs = (1 - 2 * self.ising.parities(states[lo:lo + chunk]).astype(np.int8)).astype(float)
+            term_means += probabilities[:, lo:lo + chunk] @ signs
+            state_energies = self.ising.energies(states[lo:lo + chunk])
+            energy_moments += (probabilities[0, lo:lo + chunk] * state_energies) @ signs
+        return term_means, energy_moments
+
+    def _decode(self, measurements: List[dict[str, int]]):
+        # Load counts dictionaries into records arrays of packed states
+        measurements = [
+            res if isinstance(res, np.ndarray) else counts_to_samples(res, self.ansatz.num_qubits)
+            for res in measurements
+        ]
+
+        # Stack the samples of every circuit so that the parity of every Pauli
+        # word on every state of every circuit comes out of a single popcount;
+        # circuit i owns rows bounds[i]:bounds[i+1]
+        states = np.concatenate([res["states"] for res in measurements])
+        weights = np.concatenate([res["counts"] / res["counts"].sum(dtype=float) for res in measurements])
+        bounds = np.cumsum([0] + [len(res) for res in measurements])
+        return weights, bounds, self.ising.parities(states)
+
+    def get_iteration_shots(self, num_circuits: int):
+        """
+        Get the number of shots of each of the ``num_circuits`` circuits of a
+        step: ``num_shots`` each, unless a ``shot_allocator`` is set.
+        """
+        if self.shot_allocator is None or self.exact:
+            return np.full(num_circuits, self.num_shots)
+        return self.shot_allocator.allocate(num_circuits)
+
+    def get_term_stds(self, measurements: List[dict[str, int]]):
+        """
+        Get the single-shot standard deviation of every Pauli term of
+        ``self.ising`` on each of the circuits behind ``measurements``, as a
+        (number of circuits, number of terms) array.
+        """
+        return np.sqrt(np.maximum(0.0, 1 - np.square(self.get_term_means(measurements))))
+
+    def get_iteration_params(self, curr_params: np.array):
+        """
+        Get the parameter values of the circuits that need to be evaluated to
+        step forward according to QITE, one row per circuit: the current
+        parameters first, then each parameter shifted by +pi/2 and -pi/2 in turn.
+        """
+        # The first row estimates your Hamiltonian's expected value, the others
+        # compute gradients with the parameter-shift rule
+        shifts = np.kron(np.eye(curr_params.shape[0]), [[1], [-1]]) * np.pi/2
+        return np.vstack([curr_params, curr_params + shifts])
+
     def get_iteration_circuits(self, curr_params: np.array):
         """
         Get the bound circuits that need to be evaluated to step forward
         according to QITE.
         """
-        # Use this circuit to estimate your Hamiltonian's expected value
-        circuits = [self.ansatz.assign_parameters(curr_params)]
-
-        # Use these circuits to compute gradients
-        for k in np.arange(curr_params.shape[0]):
-            for j in range(2):
-                pm_shift = curr_params.copy()
-                pm_shift[k] += (-1)**j * np.pi/2
-                circuits += [self.ansatz.assign_parameters(pm_shift)]
-        
-        # Add measurement gates and return
-        [qc.measure_all() for qc in circuits]
-        return circuits
-    
+        return [self.iteration_circuit.assign_parameters(p) for p in self.get_iteration_params(curr_params)]
+
     def plot_convergence(self):
         """
         Plot the convergence of the expected value of ``self.hamiltonian`` with
         respect to the (imaginary) time steps.
         """
+        import matplotlib.pyplot as plt
+
         plt.plot(self.energies)
         plt.xlabel("(Imaginary) Time step")
         plt.ylabel("Hamiltonian energy")
@@ -113,6 +620,9 @@ class QITEvolver:
         """
         Print summary statistics describing a QITE run.
         """
+        import pandas as pd
+        from IPython import display
+
         stats = pd.DataFrame({
             "curr_energy": self.energies,
             "num_circuits": [len(measurements)] * len(self.energies),
@@ -120,4 +630,50 @@ class QITEvolver:
         })
         stats.index.name = "step"
         display.clear_output(wait=True)
-        display.display(stats)
\ No newline at end of file
+        display.display(stats)
+
+class JSONLLogger:
+    """
+    A ``QITEvolver.evolve`` callback that appends one JSON line per step to
+    the file at ``path``: a cheap stand-in for ``print_status`` in headless
+    runs. Parameters are only logged if ``log_params`` is set.
+    """
+    def __init__(self, path: str, log_params: bool = False):
+        self.file = open(path, "a")
+        self.log_params = log_params
+
+    def __call__(self, step: dict):
+        record = {
+            "step": step["step"],
+            "energy": float(step["energy"]),
+            "num_circuits": step["num_circuits"],
+            "num_shots": step["num_shots"],
+            "timings": step["timings"],
+        }
+        if self.log_params:
+            record["params"] = step["params"].tolist()
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class Checkpointer:
+    """
+    A ``QITEvolver.evolve`` callback that saves ``qit_evolver`` to the
+    checkpoint file ``path`` every ``every`` steps.
+    """
+    def __init__(self, qit_evolver: QITEvolver, path: str, every: int = 5):
+        self.qit_evolver = qit_evolver
+        self.path = path
+        self.every = every
+
+    def __call__(self, step: dict):
+        if (step["step"] + 1) % self.every == 0:
+            self.qit_evolver.save_checkpoint(self.path)